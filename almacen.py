@@ -0,0 +1,310 @@
+"""
+Almacenes de configuración del gestor de barras.
+
+- AlmacenJSON: config.json de siempre, reescribe el documento completo.
+- AlmacenSQLite: config.db con IDs estables, índices por nombre y path y
+  actualizaciones incrementales en una transacción por cambio.
+
+Ambos entienden la misma lista de cambios que genera GestorBarras:
+    ("barra", barra_config)          alta/modificación de la barra (sin archivos)
+    ("archivo", barra_id, archivo)   alta/modificación de un archivo
+    ("eliminar_archivo", archivo_id)
+    ("eliminar_barra", barra_id)     borra la barra y sus archivos
+    ("grupos",)                      reemplaza los grupos acoplados
+    ("ajuste", clave)                guarda config[clave] (escala, ...)
+
+Importar/exportar config.json:
+    python almacen.py importar config.json config.db
+    python almacen.py exportar config.db config.json
+(exportar escribe el formato antiguo: grupos por nombre de barra, sin IDs)
+"""
+
+import os
+import sys
+import json
+import sqlite3
+
+# Claves de barra/archivo con columna propia; el resto va a "extra" (JSON)
+CAMPOS_BARRA = ("id", "nombre", "color_borde", "posicion", "archivos")
+CAMPOS_ARCHIVO = ("id", "path", "orden", "color")
+
+
+def max_id(config):
+    """Mayor ID usado por barras o archivos (0 si no hay)"""
+    ids = [0]
+    for barra in config.get("barras", []):
+        ids.append(barra.get("id") or 0)
+        ids.extend(a.get("id") or 0 for a in barra.get("archivos", []))
+    return max(ids)
+
+
+def asignar_ids(config):
+    """Asigna IDs estables a barras y archivos que no los tengan y convierte
+    los grupos antiguos (por nombre de barra) a IDs. Retorna True si modificó el config."""
+    modificado = False
+    siguiente = max_id(config) + 1
+    for barra in config.get("barras", []):
+        if "id" not in barra:
+            barra["id"] = siguiente
+            siguiente += 1
+            modificado = True
+        for archivo in barra.get("archivos", []):
+            if "id" not in archivo:
+                archivo["id"] = siguiente
+                siguiente += 1
+                modificado = True
+
+    por_nombre = {}
+    for barra in config.get("barras", []):
+        por_nombre.setdefault(barra["nombre"], barra["id"])
+    grupos = []
+    for grupo in config.get("grupos", []):
+        if any(isinstance(miembro, str) for miembro in grupo):
+            grupo = [por_nombre[m] if isinstance(m, str) else m
+                     for m in grupo if not isinstance(m, str) or m in por_nombre]
+            modificado = True
+        grupos.append(grupo)
+    if "grupos" in config:
+        config["grupos"] = grupos
+    return modificado
+
+
+def quitar_ids(config):
+    """Copia del config en el formato antiguo de config.json: grupos por nombre
+    de barra y sin los IDs internos (inversa de asignar_ids)"""
+    nombres = {barra["id"]: barra["nombre"] for barra in config.get("barras", [])}
+    exportado = {clave: valor for clave, valor in config.items() if clave not in ("barras", "grupos")}
+    exportado["barras"] = [
+        dict({k: v for k, v in barra.items() if k not in ("id", "archivos")},
+             archivos=[{k: v for k, v in a.items() if k != "id"} for a in barra.get("archivos", [])])
+        for barra in config.get("barras", [])
+    ]
+    exportado["grupos"] = [[nombres[i] for i in grupo if i in nombres]
+                           for grupo in config.get("grupos", [])]
+    return exportado
+
+
+class AlmacenJSON:
+    """config.json: cada guardado reescribe el documento completo"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def cargar(self):
+        """Retorna el config o None si no existe"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def guardar(self, config):
+        """Escribe en un temporal y lo cambia por config.json: un cierre a mitad
+        de escritura deja el archivo anterior entero, nunca uno truncado"""
+        temporal = self.path + ".tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.path)
+
+    def guardar_cambios(self, config, cambios):
+        # JSON no admite escrituras parciales
+        if cambios:
+            self.guardar(config)
+
+
+class AlmacenSQLite:
+    """config.db con IDs estables y actualizaciones incrementales"""
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS barras (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            color_borde TEXT,
+            pos_x INTEGER,
+            pos_y INTEGER,
+            orden INTEGER NOT NULL DEFAULT 0,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_barras_nombre ON barras(nombre);
+        CREATE TABLE IF NOT EXISTS archivos (
+            id INTEGER PRIMARY KEY,
+            barra_id INTEGER NOT NULL REFERENCES barras(id) ON DELETE CASCADE,
+            path TEXT NOT NULL,
+            orden INTEGER,
+            color TEXT,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_archivos_path ON archivos(path);
+        CREATE INDEX IF NOT EXISTS idx_archivos_barra ON archivos(barra_id);
+        CREATE TABLE IF NOT EXISTS grupos (
+            grupo INTEGER NOT NULL,
+            posicion INTEGER NOT NULL,
+            barra_id INTEGER NOT NULL REFERENCES barras(id) ON DELETE CASCADE,
+            PRIMARY KEY (grupo, posicion)
+        );
+        CREATE TABLE IF NOT EXISTS ajustes (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # El gestor escribe desde el ejecutor del núcleo (de uno en uno, con un lock)
+        self.conexion = sqlite3.connect(path, check_same_thread=False)
+        self.conexion.execute("PRAGMA foreign_keys = ON")
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.executescript(self.ESQUEMA)
+
+    def cargar(self):
+        """Reconstruye el config en memoria; None si la base está vacía"""
+        c = self.conexion
+        config = {clave: json.loads(valor) for clave, valor in c.execute(
+            "SELECT clave, valor FROM ajustes")}
+
+        barras = {}
+        for barra_id, nombre, color_borde, x, y, extra in c.execute(
+                "SELECT id, nombre, color_borde, pos_x, pos_y, extra FROM barras ORDER BY orden, id"):
+            barra = {"id": barra_id, "nombre": nombre, "archivos": []}
+            if color_borde is not None:
+                barra["color_borde"] = color_borde
+            if x is not None:
+                barra["posicion"] = {"x": x, "y": y}
+            if extra:
+                barra.update(json.loads(extra))
+            barras[barra_id] = barra
+
+        if not barras and not config:
+            return None
+
+        for archivo_id, barra_id, path, orden, color, extra in c.execute(
+                "SELECT id, barra_id, path, orden, color, extra FROM archivos ORDER BY barra_id, id"):
+            archivo = {"id": archivo_id, "path": path, "orden": orden}
+            if color is not None:
+                archivo["color"] = color
+            if extra:
+                archivo.update(json.loads(extra))
+            barras[barra_id]["archivos"].append(archivo)
+
+        grupos = {}
+        for grupo, barra_id in c.execute("SELECT grupo, barra_id FROM grupos ORDER BY grupo, posicion"):
+            grupos.setdefault(grupo, []).append(barra_id)
+
+        config["barras"] = list(barras.values())
+        config["grupos"] = list(grupos.values())
+        return config
+
+    def guardar(self, config):
+        """Reemplaza todo el contenido (importación o migración)"""
+        with self.conexion as c:
+            c.execute("DELETE FROM grupos")
+            c.execute("DELETE FROM archivos")
+            c.execute("DELETE FROM barras")
+            c.execute("DELETE FROM ajustes")
+            for orden, barra in enumerate(config.get("barras", [])):
+                self._guardar_barra(c, barra, orden)
+                for archivo in barra.get("archivos", []):
+                    self._guardar_archivo(c, barra["id"], archivo)
+            self._guardar_grupos(c, config)
+            for clave in config:
+                if clave not in ("barras", "grupos"):
+                    self._guardar_ajuste(c, config, clave)
+
+    def guardar_cambios(self, config, cambios):
+        """Aplica solo los cambios indicados, en una única transacción"""
+        with self.conexion as c:
+            for cambio in cambios:
+                tipo = cambio[0]
+                if tipo == "barra":
+                    self._guardar_barra(c, cambio[1])
+                elif tipo == "archivo":
+                    self._guardar_archivo(c, cambio[1], cambio[2])
+                elif tipo == "eliminar_archivo":
+                    c.execute("DELETE FROM archivos WHERE id = ?", (cambio[1],))
+                elif tipo == "eliminar_barra":
+                    c.execute("DELETE FROM barras WHERE id = ?", (cambio[1],))
+                elif tipo == "grupos":
+                    self._guardar_grupos(c, config)
+                elif tipo == "ajuste":
+                    self._guardar_ajuste(c, config, cambio[1])
+                else:
+                    raise ValueError(f"Cambio desconocido: {tipo}")
+
+    def _guardar_barra(self, c, barra, orden=None):
+        """Inserta o actualiza la barra; las nuevas sin orden van al final"""
+        posicion = barra.get("posicion") or {}
+        extra = {k: v for k, v in barra.items() if k not in CAMPOS_BARRA}
+        c.execute(
+            "INSERT INTO barras (id, nombre, color_borde, pos_x, pos_y, orden, extra) "
+            "VALUES (?, ?, ?, ?, ?, COALESCE(?, (SELECT COALESCE(MAX(orden), -1) + 1 FROM barras)), ?) "
+            "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+            "color_borde = excluded.color_borde, pos_x = excluded.pos_x, "
+            "pos_y = excluded.pos_y, extra = excluded.extra",
+            (barra["id"], barra["nombre"], barra.get("color_borde"),
+             posicion.get("x"), posicion.get("y"), orden,
+             json.dumps(extra, ensure_ascii=False) if extra else None)
+        )
+
+    def _guardar_archivo(self, c, barra_id, archivo):
+        extra = {k: v for k, v in archivo.items() if k not in CAMPOS_ARCHIVO}
+        c.execute(
+            "INSERT INTO archivos (id, barra_id, path, orden, color, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET barra_id = excluded.barra_id, "
+            "path = excluded.path, orden = excluded.orden, color = excluded.color, "
+            "extra = excluded.extra",
+            (archivo["id"], barra_id, archivo["path"], archivo.get("orden"),
+             archivo.get("color"), json.dumps(extra, ensure_ascii=False) if extra else None)
+        )
+
+    def _guardar_grupos(self, c, config):
+        c.execute("DELETE FROM grupos")
+        c.executemany(
+            "INSERT INTO grupos (grupo, posicion, barra_id) VALUES (?, ?, ?)",
+            [(g, p, barra_id)
+             for g, grupo in enumerate(config.get("grupos", []))
+             for p, barra_id in enumerate(grupo)]
+        )
+
+    def _guardar_ajuste(self, c, config, clave):
+        c.execute(
+            "INSERT INTO ajustes (clave, valor) VALUES (?, ?) "
+            "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor",
+            (clave, json.dumps(config.get(clave), ensure_ascii=False))
+        )
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+def crear_almacen(config_json, config_db):
+    """Usa SQLite si existe config.db (creado con 'importar'), si no config.json"""
+    if os.path.exists(config_db):
+        return AlmacenSQLite(config_db)
+    return AlmacenJSON(config_json)
+
+
+def main():
+    if len(sys.argv) != 4 or sys.argv[1] not in ("importar", "exportar"):
+        print(__doc__.strip().split("Importar/exportar config.json:")[1])
+        return 2
+
+    accion, origen, destino = sys.argv[1:]
+    if accion == "importar":
+        config = AlmacenJSON(origen).cargar()
+        if config is None:
+            print(f"No existe {origen}")
+            return 1
+        asignar_ids(config)
+        AlmacenSQLite(destino).guardar(config)
+        print(f"Importado: {origen} -> {destino}")
+    else:
+        config = AlmacenSQLite(origen).cargar() or {"barras": [], "grupos": []}
+        AlmacenJSON(destino).guardar(quitar_ids(config))
+        print(f"Exportado: {origen} -> {destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
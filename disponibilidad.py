@@ -0,0 +1,199 @@
+"""
+Comprobación en segundo plano de la disponibilidad de los archivos configurados.
+
+Los paths en recursos de red (UNC, unidades mapeadas) pueden tardar decenas de
+segundos en responder si el recurso está caído. Todo os.stat/os.startfile se
+hace aquí, con timeout por path y caché con TTL; la GUI solo consulta la
+caché y recibe la señal `cambiado`.
+
+Las comprobaciones usan un ejecutor propio (no el compartido del núcleo) y
+como mucho HILOS_POR_RAIZ stats a la vez por unidad o recurso: un recurso
+colgado no deja sin hilos al escaneo de ventanas, al guardado ni a los
+demás recursos. El timeout de cada path cuenta desde que un hilo coge su
+stat, no desde que se encola. Una raíz que no ha respondido aún (o que se
+cayó) se sondea con un solo path; el resto de sus paths se encola cuando la
+sonda contesta, o se marca inaccesible si vence su timeout.
+"""
+
+import os
+import stat
+import time
+import ntpath
+import asyncio
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+DISPONIBLE = "disponible"
+NO_EXISTE = "no_existe"
+INACCESIBLE = "inaccesible"  # Error de red/permiso o sin respuesta dentro del timeout
+
+# estado: DISPONIBLE/NO_EXISTE/INACCESIBLE, mtime: float o None, comprobado: time.monotonic()
+EstadoArchivo = namedtuple("EstadoArchivo", "estado mtime es_carpeta comprobado")
+
+TTL_VERIFICACION = 60  # s que se reutiliza un resultado
+TIMEOUT_VERIFICACION = 3.0  # s antes de dar un path por inaccesible
+HILOS_VERIFICACION = 4  # Hilos del ejecutor de comprobaciones
+HILOS_POR_RAIZ = 2  # Stats simultáneos como máximo en una misma raíz
+
+
+def consultar_path(path):
+    """Hace el stat (bloqueante) y lo traduce a EstadoArchivo"""
+    try:
+        info = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return EstadoArchivo(NO_EXISTE, None, False, time.monotonic())
+    except OSError:
+        return EstadoArchivo(INACCESIBLE, None, False, time.monotonic())
+    return EstadoArchivo(DISPONIBLE, info.st_mtime, stat.S_ISDIR(info.st_mode), time.monotonic())
+
+
+def raiz_de(path):
+    """Unidad o recurso compartido (\\\\servidor\\recurso) del path; "" si no tiene
+    (POSIX o relativo: no hay un recurso que bloquear)"""
+    return ntpath.splitdrive(path)[0].lower()
+
+
+class VerificadorArchivos(QObject):
+    """Caché TTL de existencia/mtime de los paths, rellenada en segundo plano"""
+
+    cambiado = pyqtSignal(str, object)  # path, EstadoArchivo (solo si cambia el estado)
+    error_apertura = pyqtSignal(str, str)  # path, mensaje
+
+    def __init__(self, nucleo, parent=None, ttl=TTL_VERIFICACION, timeout=TIMEOUT_VERIFICACION):
+        super().__init__(parent)
+        self.nucleo = nucleo
+        self.ttl = ttl
+        self.timeout = timeout
+        self.cache = {}  # {path: EstadoArchivo}
+        self.pendientes = {}  # {path: instante de envío}
+        # Raíces con un stat colgado: no se encolan más paths suyos hasta que
+        # ese stat vuelva (o se fuerce la comprobación)
+        self.raices_caidas = set()
+        # Raíces que han respondido a su último stat. Las demás se sondean con
+        # un solo path y el resto espera en `sondas` a que la sonda conteste
+        self.raices_vivas = set()
+        self.sondas = {}  # {raiz: [paths que esperan a la sonda]}
+        self.ejecutor = nucleo.crear_ejecutor("verificacion", HILOS_VERIFICACION)
+        self.semaforos = {}  # {raiz: asyncio.Semaphore(HILOS_POR_RAIZ)}
+
+    def estado(self, path):
+        """Estado en caché (None si aún no se ha comprobado). Nunca toca el disco."""
+        return self.cache.get(path)
+
+    def disponible(self, path):
+        """False solo si se sabe que no existe o es inaccesible"""
+        estado = self.cache.get(path)
+        return estado is None or estado.estado == DISPONIBLE
+
+    def comprobar(self, paths, forzar=False):
+        """Encola los paths sin resultado fresco (TTL) ni comprobación en curso.
+
+        forzar ignora el TTL y también el bloqueo de las raíces caídas.
+        """
+        ahora = time.monotonic()
+        for path in paths:
+            if path in self.pendientes:
+                continue
+            anterior = self.cache.get(path)
+            if not forzar and anterior and ahora - anterior.comprobado < self.ttl:
+                continue
+            raiz = raiz_de(path)
+            if not forzar and raiz in self.raices_caidas:
+                # El recurso sigue sin responder: no ocupar otro hilo
+                self._actualizar(path, EstadoArchivo(INACCESIBLE, None, False, ahora))
+                continue
+            self.pendientes[path] = ahora
+            if raiz and raiz not in self.raices_vivas:
+                if raiz in self.sondas:
+                    self.sondas[raiz].append(path)
+                    continue
+                self.sondas[raiz] = []  # Este path es la sonda
+            self.nucleo.lanzar("verificar", self._consultar(path, forzar))
+
+    def abrir(self, path):
+        """os.startfile fuera del hilo de la GUI; los errores llegan por error_apertura"""
+        self.nucleo.lanzar("abrir", self._abrir(path))
+
+    async def _abrir(self, path):
+        try:
+            await self.nucleo.en_hilo(os.startfile, path, ejecutor=self.ejecutor)
+        except Exception as e:
+            self.error_apertura.emit(path, str(e))
+        self._resultado(path, await self.nucleo.en_hilo(consultar_path, path, ejecutor=self.ejecutor))
+
+    async def _consultar(self, path, forzar=False):
+        # El hueco de la raíz se libera cuando el stat vuelve de verdad, no al
+        # vencer el timeout: un recurso colgado nunca ocupa más de HILOS_POR_RAIZ
+        raiz = raiz_de(path)
+        semaforo = self.semaforos.setdefault(raiz, asyncio.Semaphore(HILOS_POR_RAIZ))
+        await semaforo.acquire()
+        if not forzar and raiz in self.raices_caidas:
+            # Se cayó mientras esperaba su turno
+            semaforo.release()
+            self._raiz_caida(raiz)
+            self._resultado(path, EstadoArchivo(INACCESIBLE, None, False, time.monotonic()))
+            return
+        bucle = self.nucleo.bucle
+        empezado = bucle.create_future()
+
+        def consultar():
+            # El timeout cuenta desde que un hilo coge el stat, no desde la cola
+            bucle.call_soon_threadsafe(lambda: empezado.done() or empezado.set_result(None))
+            return consultar_path(path)
+
+        futuro = asyncio.ensure_future(self.nucleo.en_hilo(consultar, ejecutor=self.ejecutor))
+        futuro.add_done_callback(lambda _: semaforo.release())
+        await asyncio.wait([empezado, futuro], return_when=asyncio.FIRST_COMPLETED)
+        try:
+            estado = await asyncio.wait_for(asyncio.shield(futuro), self.timeout)
+        except asyncio.TimeoutError:
+            # Sin respuesta: inaccesible hasta que el stat termine (sigue en su hilo)
+            self._raiz_caida(raiz)
+            self._actualizar(path, EstadoArchivo(INACCESIBLE, None, False, time.monotonic()))
+            futuro.add_done_callback(lambda f: self._stat_colgado_terminado(path, raiz, f))
+            raise  # Cuenta como timeout en las estadísticas de la tarea
+        self._raiz_responde(raiz, estado)
+        self._resultado(path, estado)
+
+    def _stat_colgado_terminado(self, path, raiz, futuro):
+        """El stat colgado ha vuelto: la raíz deja de bloquearse sea cual sea el resultado"""
+        self.raices_caidas.discard(raiz)
+        if futuro.cancelled() or futuro.exception() is not None:
+            estado = EstadoArchivo(INACCESIBLE, None, False, time.monotonic())
+        else:
+            estado = futuro.result()
+        self._raiz_responde(raiz, estado)
+        self._resultado(path, estado)
+
+    def _raiz_caida(self, raiz):
+        """La raíz no responde: se bloquea y lo que esperaba a su sonda queda inaccesible"""
+        if not raiz:
+            return
+        self.raices_caidas.add(raiz)
+        self.raices_vivas.discard(raiz)
+        ahora = time.monotonic()
+        for path in self.sondas.pop(raiz, []):
+            self.pendientes.pop(path, None)
+            self._actualizar(path, EstadoArchivo(INACCESIBLE, None, False, ahora))
+
+    def _raiz_responde(self, raiz, estado):
+        """Un stat de la raíz ha vuelto a tiempo: se encola lo que esperaba a la sonda"""
+        if not raiz:
+            return
+        if estado.estado != INACCESIBLE:
+            self.raices_vivas.add(raiz)
+        for path in self.sondas.pop(raiz, []):
+            self.nucleo.lanzar("verificar", self._consultar(path))
+
+    def _resultado(self, path, estado):
+        self.pendientes.pop(path, None)
+        if estado.estado != INACCESIBLE:
+            self.raices_caidas.discard(raiz_de(path))
+        self._actualizar(path, estado)
+
+    def _actualizar(self, path, estado):
+        anterior = self.cache.get(path)
+        self.cache[path] = estado
+        if anterior is None or anterior.estado != estado.estado or anterior.mtime != estado.mtime:
+            self.cambiado.emit(path, estado)
@@ -0,0 +1,52 @@
+"""
+Disposición de los grupos de barras acopladas.
+
+Cuando una barra cambia de tamaño (se abren o cierran archivos y hace
+adjustSize) sus vecinas se quedan solapadas o separadas. empaquetar_grupo()
+recoloca todo el grupo en una pasada:
+
+- Filas: barras con la misma y (± tolerancia), de arriba abajo; cada fila
+  empieza justo debajo de la anterior (su barra más alta, y como mínimo
+  `tolerancia`, para que dos filas nunca acaben fundidas en una).
+- Dentro de la fila, de izquierda a derecha, cada barra pegada a la anterior.
+- La primera fila conserva su y y cada fila la x de su primera barra: el
+  grupo no se desplaza, solo se cierran huecos y solapes.
+- Las barras ocultas (sin archivos abiertos) conservan su hueco con su último
+  tamaño: si ocuparan 0, la fila siguiente tomaría su misma y y al volver a
+  mostrarse se mezclaría con ella.
+
+Es cálculo puro sobre rectángulos; quién lo llama decide qué mover.
+"""
+
+from collections import namedtuple
+
+# x, y: posición actual; ancho, alto: tamaño actual (el último si está oculta)
+Caja = namedtuple("Caja", "x y ancho alto")
+
+
+def empaquetar_grupo(cajas, tolerancia):
+    """Retorna [(x, y)] nuevas, en el orden de `cajas`.
+
+    Empates en x se resuelven por el orden de `cajas` (ordenación estable):
+    pasar las barras en el orden de la última disposición lo mantiene.
+    """
+    orden = sorted(range(len(cajas)), key=lambda i: cajas[i].y)
+    filas = []
+    for i in orden:
+        if filas and cajas[i].y - cajas[filas[-1][0]].y < tolerancia:
+            filas[-1].append(i)
+        else:
+            filas.append([i])
+
+    posiciones = [None] * len(cajas)
+    y = cajas[filas[0][0]].y if filas else 0
+    for fila in filas:
+        fila.sort(key=lambda i: cajas[i].x)
+        x = cajas[fila[0]].x
+        alto = 0
+        for i in fila:
+            posiciones[i] = (x, y)
+            x += cajas[i].ancho
+            alto = max(alto, cajas[i].alto)
+        y += max(alto, tolerancia)
+    return posiciones
@@ -0,0 +1,204 @@
+"""
+Caché de iconos de aplicación para los botones de las barras.
+
+El icono sale del ejecutable del proceso dueño de la ventana (psutil) o, si
+no tiene, de la propia ventana. Extraer un icono (ExtractIconEx + DrawIconEx)
+es caro, así que:
+
+- En memoria: LRU de QIcon por (ejecutable, tamaño), MAX_MEMORIA entradas.
+  Si no se puede saber el ejecutable (proceso protegido) la clave es
+  (hwnd, tamaño): el icono de una ventana no se comparte con otras.
+- En disco: PNG por (ejecutable, fecha del ejecutable, tamaño) en
+  ICONOS_DIR, como mucho MAX_DISCO archivos (se borran los menos usados).
+- La resolución del ejecutable, la lectura de disco y la extracción van al
+  ejecutor del núcleo; la GUI solo consulta la LRU y recibe la señal `listo`.
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+
+import psutil
+from PyQt5.QtCore import QObject, QBuffer, QByteArray, QIODevice, pyqtSignal
+from PyQt5.QtGui import QIcon, QImage, QPixmap
+
+try:
+    import win32con
+    import win32gui
+    import win32ui
+except ImportError:  # Fuera de Windows: sin extracción, los botones van sin icono
+    win32gui = None
+
+MAX_MEMORIA = 64  # Iconos en la LRU en memoria
+MAX_DISCO = 256  # PNGs en la caché de disco
+WM_GETICON = 0x007F
+ICON_SMALL2 = 2
+
+
+def renderizar_icono(hicon, tamano):
+    """Dibuja el HICON en un bitmap de tamano x tamano y lo retorna como QImage"""
+    hdc_pantalla = win32gui.GetDC(0)
+    dc = win32ui.CreateDCFromHandle(hdc_pantalla)
+    memdc = dc.CreateCompatibleDC()
+    bitmap = win32ui.CreateBitmap()
+    bitmap.CreateCompatibleBitmap(dc, tamano, tamano)
+    try:
+        memdc.SelectObject(bitmap)
+        win32gui.DrawIconEx(memdc.GetSafeHdc(), 0, 0, hicon, tamano, tamano, 0, None, win32con.DI_NORMAL)
+        bits = bitmap.GetBitmapBits(True)
+    finally:
+        memdc.DeleteDC()
+        dc.DeleteDC()
+        win32gui.ReleaseDC(0, hdc_pantalla)
+        win32gui.DeleteObject(bitmap.GetHandle())
+    # Iconos antiguos sin canal alfa: todo el alfa a 0
+    formato = QImage.Format_ARGB32 if any(bits[3::4]) else QImage.Format_RGB32
+    return QImage(bits, tamano, tamano, formato).copy()
+
+
+def extraer_icono(exe, hwnd, tamano):
+    """PNG (bytes) del icono del ejecutable o, en su defecto, de la ventana; None si no hay"""
+    if win32gui is None:
+        return None
+    propios = []
+    try:
+        try:
+            grandes, pequenos = win32gui.ExtractIconEx(exe, 0, 1) if exe else ([], [])
+            propios = grandes + pequenos
+            hicon = ((pequenos if tamano <= 16 else grandes) or propios or [None])[0]
+        except Exception:
+            hicon = None
+        if not hicon and hwnd:
+            # Icono de la ventana (no es nuestro: no se destruye)
+            _, hicon = win32gui.SendMessageTimeout(hwnd, WM_GETICON, ICON_SMALL2, 0,
+                                                   win32con.SMTO_ABORTIFHUNG, 200)
+            hicon = hicon or win32gui.GetClassLong(hwnd, win32con.GCL_HICON)
+        if not hicon:
+            return None
+
+        datos = QByteArray()
+        buffer = QBuffer(datos)
+        buffer.open(QIODevice.WriteOnly)
+        renderizar_icono(hicon, tamano).save(buffer, "PNG")
+        return bytes(datos)
+    except Exception:
+        return None
+    finally:
+        for propio in propios:
+            win32gui.DestroyIcon(propio)
+
+
+class CacheIconos(QObject):
+    """LRU en memoria + PNGs en disco de los iconos por (ejecutable, tamaño)"""
+
+    listo = pyqtSignal()  # Hay iconos nuevos en memoria
+    _terminado = pyqtSignal(int, str, int, int, object)  # pid, exe, hwnd, tamaño, PNG o None
+
+    def __init__(self, directorio, ejecutor, parent=None, max_memoria=MAX_MEMORIA,
+                 max_disco=MAX_DISCO):
+        super().__init__(parent)
+        self.directorio = directorio
+        self.ejecutor = ejecutor
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self.memoria = OrderedDict()  # {(exe o hwnd, tamaño): QIcon o None si no tiene icono}
+        self.exe_por_pid = {}  # {pid: exe}
+        self.pendientes = set()  # pids o claves de `memoria` en el ejecutor
+        self._terminado.connect(self._resultado)
+
+    def icono(self, ventana, tamano):
+        """QIcon de la aplicación de la ventana, o None si aún no está (llegará `listo`)"""
+        exe = self.exe_por_pid.get(ventana.pid)
+        if exe is None:
+            if ventana.pid not in self.pendientes:
+                self.pendientes.add(ventana.pid)
+                self.ejecutor.submit(self._cargar, ventana.pid, None, ventana.hwnd, tamano)
+            return None
+        clave = (exe or ventana.hwnd, tamano)
+        if clave in self.memoria:
+            self.memoria.move_to_end(clave)
+            return self.memoria[clave]
+        if clave not in self.pendientes:
+            # Expulsado de la LRU: vuelve desde disco
+            self.pendientes.add(clave)
+            self.ejecutor.submit(self._cargar, ventana.pid, exe, ventana.hwnd, tamano)
+        return None
+
+    # --- Hilos del ejecutor ---
+
+    def _cargar(self, pid, exe, hwnd, tamano):
+        if exe is None:
+            try:
+                exe = psutil.Process(pid).exe()
+            except (psutil.Error, OSError):
+                exe = ""
+        self._terminado.emit(pid, exe, hwnd, tamano, self._leer_o_extraer(exe, hwnd, tamano))
+
+    def _leer_o_extraer(self, exe, hwnd, tamano):
+        archivo = self._archivo_disco(exe, tamano)
+        if archivo and os.path.exists(archivo):
+            try:
+                with open(archivo, 'rb') as f:
+                    datos = f.read()
+                os.utime(archivo)  # Usado: el último en borrarse
+                return datos
+            except OSError:
+                pass
+
+        datos = extraer_icono(exe, hwnd, tamano)
+        if datos and archivo:
+            try:
+                os.makedirs(self.directorio, exist_ok=True)
+                with open(archivo, 'wb') as f:
+                    f.write(datos)
+                self._podar_disco()
+            except OSError:
+                pass
+        return datos
+
+    def _archivo_disco(self, exe, tamano):
+        """PNG en disco; la fecha del ejecutable en el nombre invalida al actualizarse"""
+        if not exe:
+            return None
+        try:
+            mtime = os.stat(exe).st_mtime_ns
+        except OSError:
+            return None
+        clave = hashlib.sha1(f"{exe.lower()}|{mtime}|{tamano}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, f"{clave}.png")
+
+    def _podar_disco(self):
+        """Borra los PNG menos usados si se pasa de max_disco"""
+        try:
+            entradas = [e for e in os.scandir(self.directorio) if e.name.endswith(".png")]
+        except OSError:
+            return
+        if len(entradas) <= self.max_disco:
+            return
+        entradas.sort(key=lambda e: e.stat().st_mtime)
+        for entrada in entradas[:len(entradas) - self.max_disco]:
+            try:
+                os.remove(entrada.path)
+            except OSError:
+                pass
+
+    # --- Hilo de la GUI ---
+
+    def _resultado(self, pid, exe, hwnd, tamano, datos):
+        clave = (exe or hwnd, tamano)
+        self.pendientes.discard(pid)
+        self.pendientes.discard(clave)
+        self.exe_por_pid[pid] = exe
+        if len(self.exe_por_pid) > 4 * self.max_memoria:
+            del self.exe_por_pid[next(iter(self.exe_por_pid))]  # El pid más antiguo
+        icono = None
+        if datos:
+            pixmap = QPixmap()
+            if pixmap.loadFromData(datos, "PNG"):
+                icono = QIcon(pixmap)
+        self.memoria[clave] = icono
+        self.memoria.move_to_end(clave)
+        while len(self.memoria) > self.max_memoria:
+            self.memoria.popitem(last=False)
+        if icono is not None:
+            self.listo.emit()
@@ -0,0 +1,325 @@
+"""
+Índice de búsqueda incremental por trigramas para el listado del gestor.
+
+Cada entrada (clave -> texto) se indexa por sus trigramas normalizados
+(minúsculas, sin tildes). agregar/eliminar solo tocan los trigramas de esa
+entrada, así que añadir, renombrar o borrar no reconstruye nada.
+
+La búsqueda es difusa: cada palabra de la consulta acepta entradas que la
+contienen o que comparten al menos UMBRAL_DIFUSO de sus trigramas, tanto en
+número como en peso IDF (errores de tecleo). Todas las palabras deben coincidir.
+
+Las letras intercambiadas ("infrome") rompen casi todos los trigramas, así
+que además se guarda el vocabulario de palabras indexadas: las que comparten
+algún trigrama (o el inicio) con la palabra buscada se comparan por distancia
+de Damerau-Levenshtein restringida (OSA: una transposición cuenta como un
+error), contra la palabra entera o su prefijo de la misma longitud.
+
+Las coincidencias exactas puntúan por niveles (empieza el texto, empieza
+una palabra, dentro de una palabra). Los dos primeros salen del vocabulario
+como conjuntos, así una parte común de los paths ("servidor", "xlsx") no
+obliga a recorrer cada texto; con una sola palabra basta llenar el cupo.
+"""
+
+import re
+import heapq
+import math
+import unicodedata
+from collections import defaultdict
+from itertools import islice
+
+UMBRAL_DIFUSO = 0.6  # Fracción mínima de trigramas compartidos
+MIN_EXACTAS = 20  # Con al menos estas coincidencias exactas no se buscan difusas
+MIN_LONGITUD_OSA = 4  # Palabras más cortas no se comparan por distancia (demasiados falsos positivos)
+SEPARADORES = " /\\._-"  # Inicio de palabra para puntuar más alto
+PATRON_PALABRAS = re.compile(r"[^ /\\._-]+")
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ("Índice" -> "indice")"""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def distancia_osa(a, b, maximo):
+    """Distancia de Damerau-Levenshtein restringida (OSA) entre a y b; maximo + 1
+    en cuanto se sabe que la supera"""
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            coste = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + coste)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+def puntuacion_exacta(texto, palabra):
+    """3 si el texto empieza por la palabra, 2.5 si empieza alguna de sus
+    palabras, 2 si solo está dentro de una; 0 si no está"""
+    posicion = texto.find(palabra)
+    if posicion <= 0:
+        return 3.0 if posicion == 0 else 0.0
+    while posicion > 0:
+        if texto[posicion - 1] in SEPARADORES:
+            return 2.5
+        posicion = texto.find(palabra, posicion + 1)
+    return 2.0
+
+
+def interseccion(conjuntos):
+    """Intersección de los conjuntos, empezando por el más pequeño"""
+    ordenados = sorted(conjuntos, key=len)
+    resultado = set(ordenados[0])
+    for conjunto in ordenados[1:]:
+        if not resultado:
+            break
+        resultado &= conjunto
+    return resultado
+
+
+def maximo_errores(palabra):
+    """Errores tolerados por distancia: 1 hasta 7 letras, 2 desde 8"""
+    return 1 if len(palabra) < 8 else 2
+
+
+def prefijos_cortos(texto):
+    """Prefijos de 1 y 2 letras de cada palabra (consultas demasiado cortas para trigramas)"""
+    prefijos = set()
+    for palabra in PATRON_PALABRAS.findall(texto):
+        prefijos.add(palabra[:1])
+        prefijos.add(palabra[:2])
+    return prefijos
+
+
+class IndiceBusqueda:
+    def __init__(self):
+        self.textos = {}  # {clave: texto normalizado}
+        self.indice = defaultdict(set)  # {trigrama o prefijo corto: {claves}}
+        self.palabras = defaultdict(set)  # {palabra del vocabulario: {claves}}
+        self.primeras = defaultdict(set)  # {palabra con la que empieza el texto: {claves}}
+        self.indice_palabras = defaultdict(set)  # {trigrama o inicio de 2 letras: {palabras}}
+
+    def __len__(self):
+        return len(self.textos)
+
+    def agregar(self, clave, *campos):
+        """Indexa (o reindexa) una entrada con uno o más campos de texto"""
+        if clave in self.textos:
+            self.eliminar(clave)
+        texto = normalizar(" / ".join(campos))
+        self.textos[clave] = texto
+        for gramo in trigramas(texto) | prefijos_cortos(texto):
+            self.indice[gramo].add(clave)
+        for palabra in set(PATRON_PALABRAS.findall(texto)):
+            if palabra not in self.palabras:
+                for gramo in self._gramos_palabra(palabra):
+                    self.indice_palabras[gramo].add(palabra)
+            self.palabras[palabra].add(clave)
+        primera = PATRON_PALABRAS.match(texto)
+        if primera:
+            self.primeras[primera.group()].add(clave)
+
+    def eliminar(self, clave):
+        texto = self.textos.pop(clave, None)
+        if texto is None:
+            return
+        for gramo in trigramas(texto) | prefijos_cortos(texto):
+            claves = self.indice[gramo]
+            claves.discard(clave)
+            if not claves:
+                del self.indice[gramo]
+        for palabra in set(PATRON_PALABRAS.findall(texto)):
+            claves = self.palabras[palabra]
+            claves.discard(clave)
+            if not claves:
+                del self.palabras[palabra]
+                for gramo in self._gramos_palabra(palabra):
+                    palabras = self.indice_palabras[gramo]
+                    palabras.discard(palabra)
+                    if not palabras:
+                        del self.indice_palabras[gramo]
+        primera = PATRON_PALABRAS.match(texto)
+        if primera:
+            claves = self.primeras[primera.group()]
+            claves.discard(clave)
+            if not claves:
+                del self.primeras[primera.group()]
+
+    def buscar(self, consulta, limite=200):
+        """Retorna [(clave, puntuacion)] de mejor a peor (vacío si no hay consulta)"""
+        palabras = normalizar(consulta).split()
+        if not palabras:
+            return []
+
+        # Más largas primero: son las más selectivas y acotan antes el resultado.
+        # Con una sola palabra basta con sus `limite` mejores
+        palabras.sort(key=len, reverse=True)
+        puntuaciones = self._buscar_palabra(palabras[0], limite=limite if len(palabras) == 1 else None)
+        for palabra in palabras[1:]:
+            if not puntuaciones:
+                break
+            otras = self._buscar_palabra(palabra, puntuaciones)
+            puntuaciones = {clave: p + otras[clave] for clave, p in puntuaciones.items() if clave in otras}
+        return heapq.nlargest(limite, puntuaciones.items(), key=lambda item: item[1])
+
+    def _buscar_palabra(self, palabra, candidatos=None, limite=None):
+        """Retorna {clave: puntuacion} de las entradas que contienen (o casi) la palabra.
+
+        Con limite (y sin candidatos) puede quedarse con las `limite` mejores
+        exactas sin puntuar el resto.
+        """
+        if len(palabra) < 3:
+            # Sin trigramas: solo inicios de palabra, por el índice de prefijos cortos
+            claves = self.indice.get(palabra, set())
+            if candidatos is not None:
+                return self._puntuar_exactas(palabra, lambda: claves.intersection(candidatos),
+                                             filtro=candidatos)
+            return self._puntuar_exactas(palabra, lambda: claves, limite)
+
+        trigramas_palabra = trigramas(palabra)
+        minimo = max(1, math.ceil(len(trigramas_palabra) * UMBRAL_DIFUSO))
+        conjuntos = {t: self.indice.get(t, ()) for t in trigramas_palabra}
+
+        # Peso IDF de cada trigrama indexado: los que aparecen en casi todas las
+        # entradas (p.ej. la carpeta común de todos los paths) apenas cuentan
+        total = len(self.textos)
+        pesos = {t: math.log((total + 1) / (len(c) + 1)) for t, c in conjuntos.items() if c}
+        peso_total = sum(pesos.values())
+        peso_minimo = peso_total * UMBRAL_DIFUSO
+
+        filtro = candidatos  # Entradas ya aceptadas por las otras palabras (o None)
+
+        # 1) Exactas: intersección de los conjuntos de sus trigramas
+        def exactas():
+            claves = interseccion(conjuntos.values())
+            if filtro is not None:
+                claves.intersection_update(filtro)
+            return claves
+
+        resultado = self._puntuar_exactas(palabra, exactas, limite if filtro is None else None, filtro)
+        if filtro is None and len(resultado) >= min(MIN_EXACTAS, limite or MIN_EXACTAS):
+            return resultado
+
+        # 2) Difusas: una entrada que no está en ninguno de los conjuntos más
+        # raros solo puede sumar el peso restante; se unen conjuntos hasta
+        # que ese resto no alcance el mínimo
+        candidatos = set()
+        restante = peso_total
+        for t in sorted(pesos, key=pesos.get, reverse=True):
+            if restante < peso_minimo:
+                break
+            candidatos |= conjuntos[t]
+            restante -= pesos[t]
+        candidatos.difference_update(resultado)
+        if filtro is not None:
+            candidatos.intersection_update(filtro)
+
+        textos = self.textos
+        for clave in candidatos:
+            texto = textos[clave]
+            puntuacion = puntuacion_exacta(texto, palabra)
+            if puntuacion:
+                resultado[clave] = puntuacion
+            elif peso_total:
+                compartidos = [t for t in trigramas_palabra if t in texto]
+                peso = sum(pesos.get(t, 0.0) for t in compartidos)
+                if len(compartidos) >= minimo and peso >= peso_minimo:
+                    resultado[clave] = peso / peso_total
+
+        # 3) Letras intercambiadas u otro error suelto: por el vocabulario
+        if filtro is not None:
+            filtro = [clave for clave in filtro if clave not in resultado]
+            if not filtro:
+                return resultado
+        for clave, puntuacion in self._buscar_parecidas(palabra, filtro).items():
+            if puntuacion > resultado.get(clave, 0.0):
+                resultado[clave] = puntuacion
+        return resultado
+
+    def _buscar_parecidas(self, palabra, candidatos=None):
+        """{clave: puntuacion} de las entradas con una palabra a distancia OSA
+        tolerable de la buscada (entera o su prefijo de la misma longitud)"""
+        if len(palabra) < MIN_LONGITUD_OSA:
+            return {}
+        maximo = maximo_errores(palabra)
+        vocabulario = set()
+        for gramo in self._gramos_palabra(palabra):
+            vocabulario |= self.indice_palabras.get(gramo, set())
+
+        resultado = {}
+        for otra in vocabulario:
+            if len(otra) < len(palabra) - maximo:
+                continue
+            distancia = min(distancia_osa(palabra, otra, maximo),
+                            distancia_osa(palabra, otra[:len(palabra)], maximo))
+            if distancia > maximo:
+                continue
+            # Por debajo de las exactas (2-3) y a la par de las difusas por trigramas
+            puntuacion = 1.0 - distancia / len(palabra)
+            claves = self.palabras[otra]
+            if candidatos is not None:
+                claves = claves.intersection(candidatos)
+            for clave in claves:
+                if puntuacion > resultado.get(clave, 0.0):
+                    resultado[clave] = puntuacion
+        return resultado
+
+    @staticmethod
+    def _gramos_palabra(palabra):
+        """Claves de la palabra en indice_palabras: sus trigramas y sus 2 primeras letras"""
+        return trigramas(palabra) | {palabra[:2]}
+
+    def _puntuar_exactas(self, palabra, exactas, limite=None, filtro=None):
+        """{clave: puntuacion_exacta()} de las entradas que contienen la palabra.
+
+        exactas() da las candidatas (intersección de trigramas, ya filtrada;
+        puede traer falsos positivos). Se puntúa por niveles: empieza el texto
+        y empieza una palabra salen del vocabulario (`primeras`, `palabras`)
+        como conjuntos, solo "dentro de una palabra" recorre exactas(). Con
+        limite se para al llenar el cupo con las mejores.
+        """
+        textos = self.textos
+        if any(c in SEPARADORES for c in palabra):
+            # Cruza palabras: el vocabulario no sirve, se busca en cada texto
+            resultado = {}
+            for clave in exactas():
+                puntuacion = puntuacion_exacta(textos[clave], palabra)
+                if puntuacion:
+                    resultado[clave] = puntuacion
+            return resultado
+
+        primeras = set()
+        for otra in self.primeras:
+            if otra.startswith(palabra):
+                primeras |= self.primeras[otra]
+        if len(palabra) < 3:
+            inicios = self.indice.get(palabra, set())
+        else:
+            inicios = set()
+            for otra in self.indice_palabras.get(palabra[:2], ()):
+                if otra.startswith(palabra):
+                    inicios |= self.palabras[otra]
+        if filtro is not None:
+            primeras = primeras.intersection(filtro)
+            inicios = inicios.intersection(filtro)
+
+        cupo = len(textos) if limite is None else limite
+        resultado = dict.fromkeys(islice(primeras, cupo), 3.0)
+        if len(resultado) < cupo:
+            resultado.update(dict.fromkeys(islice(inicios - primeras, cupo - len(resultado)), 2.5))
+        if len(resultado) < cupo:
+            dentro = (clave for clave in exactas() if clave not in inicios and palabra in textos[clave])
+            resultado.update(dict.fromkeys(islice(dentro, cupo - len(resultado)), 2.0))
+        return resultado
@@ -0,0 +1,243 @@
+"""
+Núcleo asíncrono: un único bucle asyncio integrado con el de Qt (qasync).
+
+Dependencia: qasync (pip install qasync).
+
+El escaneo de ventanas, la comprobación de archivos, el snapshot, las
+conexiones IPC y el guardado de la configuración son corrutinas de este
+bucle, cancelables y con timeout. Las llamadas bloqueantes (Win32, psutil,
+disco) van al ejecutor compartido, de hilos daemon: un stat colgado en un
+recurso de red no impide cerrar la aplicación. Quien pueda colgarse a
+menudo (la comprobación de archivos en red) pide su propio ejecutor con
+crear_ejecutor() para no dejar sin hilos al escaneo ni al guardado.
+
+Cada tarea lleva sus estadísticas (ejecuciones, errores, timeouts, latencia
+y retraso sobre lo programado); Nucleo.estadisticas() las reúne junto con
+las llamadas que esperan en cada ejecutor (comando IPC "estadisticas").
+"""
+
+import time
+import queue
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, Future
+
+import qasync
+from PyQt5.QtWidgets import QApplication
+
+HILOS_EJECUTOR = 8
+
+
+def crear_bucle(app):
+    """Crea el bucle asyncio sobre la QApplication y lo deja como bucle actual"""
+    bucle = qasync.QEventLoop(app)
+    asyncio.set_event_loop(bucle)
+    return bucle
+
+
+async def esperar_senal(*senales, timeout=None):
+    """Espera a que se emita cualquiera de las señales Qt; retorna sus argumentos"""
+    futuro = asyncio.get_running_loop().create_future()
+
+    def recibir(*args):
+        if not futuro.done():
+            futuro.set_result(args)
+
+    for senal in senales:
+        senal.connect(recibir)
+    try:
+        return await asyncio.wait_for(futuro, timeout)
+    finally:
+        for senal in senales:
+            try:
+                senal.disconnect(recibir)
+            except TypeError:
+                pass  # El objeto emisor ya se destruyó
+
+
+class EjecutorDemonio(Executor):
+    """Executor de hilos daemon.
+
+    ThreadPoolExecutor espera a sus hilos al salir; aquí una llamada colgada
+    (recurso de red caído) no bloquea el cierre.
+    """
+
+    def __init__(self, hilos=HILOS_EJECUTOR, nombre="nucleo"):
+        self.cola = queue.Queue()
+        self._cerrado = False
+        for i in range(hilos):
+            threading.Thread(target=self._trabajar, name=f"{nombre}-{i}", daemon=True).start()
+
+    def submit(self, funcion, *args, **kwargs):
+        if self._cerrado:
+            raise RuntimeError("Ejecutor cerrado")
+        futuro = Future()
+        self.cola.put((futuro, funcion, args, kwargs))
+        return futuro
+
+    def shutdown(self, wait=False, *, cancel_futures=False):
+        # No se espera a los hilos: son daemon
+        self._cerrado = True
+
+    def pendientes(self):
+        """Llamadas en cola que aún no ha cogido ningún hilo"""
+        return self.cola.qsize()
+
+    def _trabajar(self):
+        while True:
+            futuro, funcion, args, kwargs = self.cola.get()
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                futuro.set_result(funcion(*args, **kwargs))
+            except BaseException as e:
+                futuro.set_exception(e)
+
+
+class EstadisticasTarea:
+    """Contadores y tiempos (s) de una tarea con nombre"""
+
+    def __init__(self):
+        self.ejecuciones = 0
+        self.activas = 0  # Ejecuciones en curso (varias si son tareas sueltas)
+        self.errores = 0
+        self.timeouts = 0
+        self.ultimo_error = ""
+        self.latencia_ultima = 0.0
+        self.latencia_max = 0.0
+        self.latencia_total = 0.0
+        self.retraso_max = 0.0  # Periódicas: cuánto tarde empezó respecto a lo programado
+
+    def como_dict(self):
+        return {
+            "ejecuciones": self.ejecuciones,
+            "activas": self.activas,
+            "errores": self.errores,
+            "timeouts": self.timeouts,
+            "ultimo_error": self.ultimo_error,
+            "latencia_ultima_ms": round(self.latencia_ultima * 1000, 2),
+            "latencia_media_ms": round(self.latencia_total / self.ejecuciones * 1000, 2)
+            if self.ejecuciones else 0.0,
+            "latencia_max_ms": round(self.latencia_max * 1000, 2),
+            "retraso_max_ms": round(self.retraso_max * 1000, 2),
+        }
+
+
+class Nucleo:
+    """Bucle, ejecutor compartido y tareas con nombre"""
+
+    def __init__(self, hilos=HILOS_EJECUTOR):
+        bucle = None
+        try:
+            bucle = asyncio.get_event_loop_policy().get_event_loop()
+        except RuntimeError:
+            pass
+        if not isinstance(bucle, qasync.QEventLoop):
+            bucle = crear_bucle(QApplication.instance())
+        self.bucle = bucle
+        self.ejecutor = EjecutorDemonio(hilos)
+        self.ejecutores = {"nucleo": self.ejecutor}  # {nombre: EjecutorDemonio}
+        self.periodicas = {}  # {nombre: asyncio.Task}
+        self.sueltas = set()  # Tareas de una sola ejecución en curso
+        self.estadisticas_tareas = {}  # {nombre: EstadisticasTarea}
+
+    def crear_ejecutor(self, nombre, hilos):
+        """Ejecutor aparte (hilos daemon) que cerrar() y estadisticas() también cubren"""
+        ejecutor = EjecutorDemonio(hilos, nombre)
+        self.ejecutores[nombre] = ejecutor
+        return ejecutor
+
+    async def en_hilo(self, funcion, *args, timeout=None, ejecutor=None):
+        """Ejecuta una llamada bloqueante en el ejecutor compartido (o en `ejecutor`).
+
+        Con timeout se deja de esperar, pero la llamada sigue en su hilo
+        hasta terminar (no se puede interrumpir un stat o una llamada Win32).
+        """
+        futuro = self.bucle.run_in_executor(ejecutor or self.ejecutor, functools.partial(funcion, *args))
+        if timeout is None:
+            return await futuro
+        return await asyncio.wait_for(asyncio.shield(futuro), timeout)
+
+    def lanzar(self, nombre, corrutina, timeout=None):
+        """Ejecuta la corrutina una vez como tarea con nombre; retorna la asyncio.Task"""
+        tarea = self.bucle.create_task(self._medir(nombre, corrutina, timeout))
+        self.sueltas.add(tarea)
+        tarea.add_done_callback(self.sueltas.discard)
+        return tarea
+
+    def periodica(self, nombre, funcion, intervalo, timeout=None):
+        """Llama a funcion() cada `intervalo` s (puede retornar una corrutina).
+
+        Si una ejecución se alarga no se acumulan las perdidas: la siguiente
+        empieza en cuanto termina y el retraso queda en las estadísticas.
+        """
+        self.cancelar(nombre)
+        self.periodicas[nombre] = self.bucle.create_task(
+            self._repetir(nombre, funcion, intervalo, timeout))
+
+    def cancelar(self, nombre):
+        tarea = self.periodicas.pop(nombre, None)
+        if tarea:
+            tarea.cancel()
+
+    def cerrar(self):
+        """Cancela todas las tareas y deja de aceptar trabajo en los ejecutores"""
+        for nombre in list(self.periodicas):
+            self.cancelar(nombre)
+        for tarea in list(self.sueltas):
+            tarea.cancel()
+        for ejecutor in self.ejecutores.values():
+            ejecutor.shutdown()
+
+    def estadisticas(self):
+        return {
+            "ejecutor_pendientes": self.ejecutor.pendientes(),
+            "ejecutores_pendientes": {nombre: e.pendientes() for nombre, e in self.ejecutores.items()},
+            "tareas": {nombre: e.como_dict() for nombre, e in self.estadisticas_tareas.items()},
+        }
+
+    async def _repetir(self, nombre, funcion, intervalo, timeout):
+        siguiente = self.bucle.time()
+        while True:
+            retraso = max(0.0, self.bucle.time() - siguiente)
+            await self._medir(nombre, self._llamar(funcion), timeout, retraso)
+            siguiente += intervalo
+            espera = siguiente - self.bucle.time()
+            if espera < 0:
+                siguiente = self.bucle.time()
+                espera = 0
+            await asyncio.sleep(espera)
+
+    @staticmethod
+    async def _llamar(funcion):
+        resultado = funcion()
+        if asyncio.iscoroutine(resultado):
+            resultado = await resultado
+        return resultado
+
+    async def _medir(self, nombre, corrutina, timeout, retraso=0.0):
+        """Ejecuta la corrutina registrando latencia, timeouts y errores (no los propaga)"""
+        estadisticas = self.estadisticas_tareas.setdefault(nombre, EstadisticasTarea())
+        estadisticas.activas += 1
+        inicio = time.perf_counter()
+        try:
+            return await asyncio.wait_for(corrutina, timeout)
+        except asyncio.TimeoutError:
+            estadisticas.timeouts += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            estadisticas.errores += 1
+            estadisticas.ultimo_error = repr(e)
+        finally:
+            estadisticas.activas -= 1
+            self._registrar(nombre, time.perf_counter() - inicio, retraso)
+
+    def _registrar(self, nombre, latencia, retraso):
+        estadisticas = self.estadisticas_tareas.setdefault(nombre, EstadisticasTarea())
+        estadisticas.ejecuciones += 1
+        estadisticas.latencia_ultima = latencia
+        estadisticas.latencia_total += latencia
+        estadisticas.latencia_max = max(estadisticas.latencia_max, latencia)
+        estadisticas.retraso_max = max(estadisticas.retraso_max, retraso)
@@ -0,0 +1,157 @@
+"""
+Asignación incremental de colores para archivos y barras.
+
+Los colores se eligen de una rejilla fija de candidatos HSL y se comparan en
+CIELAB (distancia euclídea, ΔE76): cada color nuevo es el candidato más
+alejado de todos los que ya están en uso. Los colores ya asignados no se
+recalculan nunca; añadir un archivo solo elige el suyo.
+
+PaletaPerceptual guarda, para cada candidato, la distancia al color en uso
+más cercano. Asignar un color solo actualiza ese array con la distancia al
+nuevo (O(candidatos)), sin volver a comparar contra toda la paleta. Con numpy
+las operaciones son vectoriales; sin él se usan listas de Python.
+"""
+
+import math
+import colorsys
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # Opcional: sin numpy se usa el cálculo en Python puro
+    np = None
+
+# Rejilla de candidatos: 72 tonos x 3 saturaciones x 3 luminosidades
+TONOS = range(0, 360, 5)
+SATURACIONES = (60, 75, 90)
+LUMINOSIDADES = (35, 45, 55)
+
+# Con todos los candidatos por debajo de esta distancia a algún color en uso
+# la paleta está agotada: se empieza otra ronda (los colores se repiten, pero
+# de nuevo lo más separados posible entre sí)
+DISTANCIA_AGOTADA = 1.0
+
+
+def formato_hsl(h, s, l):
+    return f"hsl({h}, {s}%, {l}%)"
+
+
+def parsear_color(color):
+    """Retorna (r, g, b) en 0-1 de un "hsl(h, s%, l%)" o "#rrggbb"; None si no se entiende"""
+    try:
+        if color.startswith("hsl"):
+            h, s, l = (float(p.strip()) for p in
+                       color.replace("hsl(", "").replace(")", "").replace("%", "").split(","))
+            return colorsys.hls_to_rgb(h / 360, l / 100, s / 100)
+        if color.startswith("#") and len(color) == 7:
+            return tuple(int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+def rgb_a_lab(r, g, b):
+    """sRGB (0-1) a CIELAB con iluminante D65"""
+    def lineal(c):
+        return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+    r, g, b = lineal(r), lineal(g), lineal(b)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t):
+        return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+class PaletaPerceptual:
+    """Colores en uso y distancia de cada candidato al más cercano de ellos"""
+
+    def __init__(self, colores=()):
+        self.candidatos = [formato_hsl(h, s, l) for h in TONOS
+                           for s in SATURACIONES for l in LUMINOSIDADES]
+        labs = [rgb_a_lab(*parsear_color(c)) for c in self.candidatos]
+        self.labs = np.array(labs) if np is not None else labs
+        self.en_uso = Counter()  # {color: veces que se usa}
+        self._distancias = self._sin_colores()
+        self.agregar(colores)
+
+    def __len__(self):
+        return sum(self.en_uso.values())
+
+    def agregar(self, colores):
+        """Registra colores ya asignados (p.ej. los del config al cargar)"""
+        nuevos = [c for c in colores if c]
+        self.en_uso.update(nuevos)
+        labs = [lab for lab in (self._lab(c) for c in set(nuevos)) if lab is not None]
+        if labs:
+            self._acercar(labs)
+
+    def liberar(self, colores):
+        """Quita colores que ya no se usan (archivo o barra eliminados)"""
+        quitado = False
+        for color in colores:
+            if self.en_uso.get(color):
+                self.en_uso[color] -= 1
+                if not self.en_uso[color]:
+                    del self.en_uso[color]
+                    quitado = True
+        if quitado:
+            # Las distancias solo saben acercarse: se recalculan con los que quedan
+            self._distancias = self._sin_colores()
+            labs = [lab for lab in map(self._lab, self.en_uso) if lab is not None]
+            if labs:
+                self._acercar(labs)
+
+    def asignar(self, cantidad):
+        """Retorna `cantidad` colores nuevos, cada uno el más alejado de los anteriores"""
+        colores = []
+        for _ in range(cantidad):
+            indice = self._mas_lejano()
+            if self._distancias[indice] < DISTANCIA_AGOTADA:
+                self._distancias = self._sin_colores()
+                indice = self._mas_lejano()
+            color = self.candidatos[indice]
+            self._acercar([self.labs[indice]])
+            self.en_uso[color] += 1
+            colores.append(color)
+        return colores
+
+    def nuevo_color(self):
+        return self.asignar(1)[0]
+
+    def _lab(self, color):
+        rgb = parsear_color(color)
+        return rgb_a_lab(*rgb) if rgb else None
+
+    def _sin_colores(self):
+        if np is not None:
+            return np.full(len(self.candidatos), np.inf)
+        return [math.inf] * len(self.candidatos)
+
+    def _mas_lejano(self):
+        if np is not None:
+            return int(np.argmax(self._distancias))
+        distancias = self._distancias
+        return max(range(len(distancias)), key=distancias.__getitem__)
+
+    def _acercar(self, labs):
+        """Baja la distancia de cada candidato a la de su color más cercano entre labs"""
+        if np is not None:
+            labs = np.asarray(labs, dtype=float)
+            # Por bloques para acotar la matriz candidatos x colores
+            for inicio in range(0, len(labs), 256):
+                bloque = labs[inicio:inicio + 256]
+                diferencias = self.labs[:, None, :] - bloque[None, :, :]
+                minimas = np.sqrt((diferencias ** 2).sum(axis=2)).min(axis=1)
+                np.minimum(self._distancias, minimas, out=self._distancias)
+            return
+        distancias = self._distancias
+        for lab in labs:
+            for i, candidato in enumerate(self.labs):
+                d = math.dist(candidato, lab)
+                if d < distancias[i]:
+                    distancias[i] = d
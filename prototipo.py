@@ -1,32 +1,72 @@
 """
 Prototipo: Barras de tareas personalizadas para Windows
-Requiere: pip install PyQt5 pywin32 psutil
+Requiere: pip install PyQt5 pywin32 psutil qasync (numpy opcional, ver paleta.py)
+(sin pywin32 solo funciona con un backend de ventanas simulado, ver simulacion.py)
 
 Hotkeys/funcionalidad:
 - Click en botón: toggle minimizar/restaurar ventana
+- Click derecho en barra: minimizar/restaurar todas sus ventanas
+- Ctrl+Alt+Espacio: selector rápido de archivos abiertos
+- Segunda instancia: prototipo.py --minimizar BARRA / --restaurar BARRA ("*" = todas),
+  --selector, --estadisticas (tareas del núcleo asíncrono),
+  --grabar TRAZA [--anonimizar] / --detener-grabacion (ver trazas.py)
 - Arrastrar barra: mover libremente
 - Arrastrar cerca de taskbar: snap a esquina izquierda/derecha
 - Arrastrar barras juntas: se acoplan y mueven como grupo
+- Al cambiar de tamaño una barra acoplada, su grupo se recoloca sin huecos ni solapes
+  (ver disposicion.py)
 """
 
 import sys
 import os
+import copy
 import json
+import time
+import asyncio
+import ntpath
+import threading
+from collections import namedtuple
 import psutil
-import win32gui
-import win32con
-import win32process
-import win32api
+try:
+    import win32gui
+    import win32con
+    import win32process
+    import win32api
+    import pythoncom
+    import win32com.client
+    import ctypes
+    user32 = ctypes.windll.user32  # ShowWindowAsync/DeferWindowPos (no están en pywin32)
+    # HDWP es un puntero: sin restype ctypes lo truncaría a int de 32 bits
+    user32.BeginDeferWindowPos.restype = ctypes.c_void_p
+    user32.DeferWindowPos.restype = ctypes.c_void_p
+    user32.DeferWindowPos.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p] + [ctypes.c_int] * 4 + [ctypes.c_uint]
+    user32.EndDeferWindowPos.argtypes = [ctypes.c_void_p]
+except (ImportError, AttributeError):  # Fuera de Windows (pruebas con backend simulado)
+    win32gui = win32con = win32process = win32api = pythoncom = user32 = None
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QHBoxLayout, QPushButton, QMessageBox,
     QSystemTrayIcon, QInputDialog, QFileDialog, QSlider, QLabel, QVBoxLayout,
-    QScrollArea, QFrame, QGroupBox, QMenu, QAction
+    QScrollArea, QFrame, QGroupBox, QMenu, QAction, QLineEdit
 )
-from PyQt5.QtCore import QTimer, Qt, QRect
+from PyQt5.QtCore import Qt, QRect, QSize, QTimer
 from PyQt5.QtNetwork import QLocalServer, QLocalSocket
 from PyQt5.QtGui import QIcon, QColor
 
+from almacen import crear_almacen, asignar_ids, max_id
+from disponibilidad import VerificadorArchivos, DISPONIBLE, NO_EXISTE, TTL_VERIFICACION
+from indice_busqueda import IndiceBusqueda
+from paleta import PaletaPerceptual
+from iconos import CacheIconos
+from nucleo import Nucleo, crear_bucle, esperar_senal
+from trazas import GrabadoraTrazas
+from disposicion import Caja, empaquetar_grupo
+from selector_rapido import IndiceRecientes, SelectorRapido, AtajoGlobal, ATAJO_SELECTOR
+
+NOMBRE_SERVIDOR = "BarrasTareasApp"  # QLocalServer para instancia única y comandos IPC
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), "config.json")
+CONFIG_DB = os.path.join(os.path.dirname(__file__), "config.db")  # Si existe, se usa en vez de CONFIG_FILE
+ESTADO_FILE = os.path.join(os.path.dirname(__file__), "estado.json")
+ICONOS_DIR = os.path.join(os.path.dirname(__file__), "iconos_cache")
 
 # Constantes base (se multiplican por SCALE_FACTOR)
 BASE_BUTTON_PADDING_V = 8
@@ -35,6 +75,7 @@ BASE_FONT_SIZE = 12
 BASE_MARGIN = 4
 BASE_BORDER_RADIUS = 4
 BASE_CONTAINER_MARGIN = 8
+BASE_ICON_SIZE = 16
 DEFAULT_SCALE = 1.4
 
 # Umbrales para snap/acoplamiento
@@ -42,28 +83,32 @@ SNAP_THRESHOLD = 30  # Pixels para detectar cercanía a taskbar
 DOCK_THRESHOLD = 20  # Pixels para acoplar barras entre sí
 UNDOCK_THRESHOLD = 50  # Pixels para desacoplar barra del grupo
 
+# Búsqueda en el gestor
+LIMITE_RESULTADOS = 200  # Entradas (barras o archivos) mostradas como máximo al filtrar
+RETARDO_BUSQUEDA = 150  # ms sin teclear antes de filtrar el listado
 
-def generar_color_unico(indice):
-    """Genera color HSL saturado para barras (distribuido con primo 37)"""
-    hue = (indice * 37) % 360
-    return f"hsl({hue}, 70%, 45%)"
+# Monitor de ventanas
+INTERVALO_MONITOR = 2000  # ms entre escaneos de ventanas (uno para todas las barras)
+INTERVALO_SNAPSHOT = 10000  # ms entre guardados del snapshot si cambió
+TIMEOUT_ESCANEO = 5.0  # s: un escaneo más lento se abandona (EnumWindows con una app colgada)
+RETARDO_GUARDADO = 0.3  # s: los cambios de config que llegan juntos se guardan en una escritura
+TIMEOUT_GUARDADO = 10.0
+TIMEOUT_IPC = 5.0  # s sin comandos antes de cerrar una conexión local
 
+# Ventanas del Explorador: se emparejan por ubicación, no por título
+CLASES_EXPLORADOR = ("CabinetWClass", "ExploreWClass")
+REVALIDAR_CARPETAS = 10  # s: re-consultar la ubicación aunque el título no cambie
 
-def generar_color_archivo(indice_archivo, total_archivos, hue_base=0):
-    """Genera color para archivo, máximo contraste entre archivos de misma barra.
+# Ventana visible con título, tal como la devuelve el escaneo.
+# carpeta: ubicación normalizada si es una ventana del Explorador
+Ventana = namedtuple("Ventana", "hwnd titulo pid minimizada clase carpeta",
+                     defaults=(False, "", ""))
 
-    Distribuye colores uniformemente en el círculo cromático.
-    indice_archivo: 0, 1, 2...
-    total_archivos: cuántos archivos hay en la barra
-    hue_base: offset para que cada barra tenga paleta diferente
-    """
-    if total_archivos <= 1:
-        separacion = 0
-    else:
-        separacion = 360 // total_archivos
 
-    hue = (hue_base + indice_archivo * separacion) % 360
-    return f"hsl({hue}, 75%, 45%)"
+def generar_color_unico(indice):
+    """Genera color HSL saturado para barras (distribuido con primo 37)"""
+    hue = (indice * 37) % 360
+    return f"hsl({hue}, 70%, 45%)"
 
 
 def color_contraste(hsl_color):
@@ -108,21 +153,260 @@ def hsl_to_hex(hsl_color):
         return "#3498db"
 
 
+def normalizar_ruta(path):
+    """Ruta comparable al estilo Windows (minúsculas, barras invertidas)"""
+    return ntpath.normcase(ntpath.normpath(path)) if path else ""
+
+
+def marca_disponibilidad(estado):
+    """Prefijo y nota de tooltip para archivos que no están disponibles"""
+    if estado is None or estado.estado == DISPONIBLE:
+        return "", ""
+    if estado.estado == NO_EXISTE:
+        return "⚠ ", "No encontrado"
+    return "⚠ ", "Inaccesible (el recurso no responde)"
+
+
+class BackendWin32:
+    """Acceso a las ventanas reales de Windows (EnumWindows/ShowWindow)"""
+
+    def __init__(self):
+        self._com = threading.local()  # COM ya inicializado en este hilo
+
+    def inicializar_com(self):
+        """CoInitialize una sola vez por hilo: los del ejecutor viven lo que la
+        aplicación y COM se libera al terminar el proceso"""
+        if not getattr(self._com, "iniciado", False):
+            pythoncom.CoInitialize()
+            self._com.iniciado = True
+
+    def enumerar(self):
+        """Lista las ventanas visibles con título (un único EnumWindows)"""
+        ventanas = []
+
+        def callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd):
+                titulo = win32gui.GetWindowText(hwnd)
+                if titulo:
+                    _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                    ventanas.append(Ventana(hwnd, titulo, pid, bool(win32gui.IsIconic(hwnd)),
+                                            win32gui.GetClassName(hwnd)))
+            return True
+
+        win32gui.EnumWindows(callback, None)
+        return ventanas
+
+    def consultar_carpetas(self, hwnds):
+        """Ubicación de las ventanas del Explorador indicadas: {hwnd: path}.
+
+        Una sola pasada por Shell.Application.Windows(); solo se lee la
+        ubicación de las ventanas pedidas.
+        """
+        self.inicializar_com()  # Necesario en hilos que no son el de la GUI
+        pendientes = set(hwnds)
+        ubicaciones = {}
+        for ventana in win32com.client.Dispatch("Shell.Application").Windows():
+            try:
+                hwnd = ventana.HWND
+                if hwnd in pendientes:
+                    # Con pestañas (Windows 11) varias comparten hwnd: gana la última
+                    ubicaciones[hwnd] = ventana.Document.Folder.Self.Path
+            except Exception:
+                continue  # Ventanas de IE u otras sin Document.Folder
+        return ubicaciones
+
+    def sigue_viva(self, ventana):
+        """Comprueba (barato) que el hwnd existe y sigue perteneciendo al mismo proceso"""
+        if not psutil.pid_exists(ventana.pid):
+            return False
+        try:
+            if not win32gui.IsWindow(ventana.hwnd):
+                return False
+            _, pid = win32process.GetWindowThreadProcessId(ventana.hwnd)
+            return pid == ventana.pid
+        except Exception:
+            return False
+
+    def ventana_activa(self):
+        return win32gui.GetForegroundWindow()
+
+    def restaurar(self, hwnd):
+        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+        win32gui.SetForegroundWindow(hwnd)
+
+    def activar(self, hwnd):
+        """Trae al frente sin SW_RESTORE (una ventana maximizada sigue maximizada)"""
+        win32gui.SetForegroundWindow(hwnd)
+
+    def minimizar(self, hwnd):
+        win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
+
+    def cerrar(self, hwnd):
+        """Envía WM_CLOSE (la aplicación puede pedir guardar)"""
+        win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+
+    def minimizar_lote(self, hwnds):
+        """Minimiza todas sin esperar a que cada aplicación repinte"""
+        for hwnd in hwnds:
+            user32.ShowWindowAsync(hwnd, win32con.SW_MINIMIZE)
+
+    def restaurar_lote(self, hwnds, minimizadas=()):
+        """Restaura las minimizadas y deja todas en el z-order dado (la primera encima).
+
+        Solo las minimizadas cambian de estado, con SW_RESTORE (vuelven
+        maximizadas si lo estaban); al resto solo se les cambia el z-order,
+        así una ventana maximizada no se desmaximiza.
+        """
+        for hwnd in minimizadas:
+            user32.ShowWindowAsync(hwnd, win32con.SW_RESTORE)
+
+        # Un único DeferWindowPos para todo el z-order
+        flags = win32con.SWP_NOMOVE | win32con.SWP_NOSIZE | win32con.SWP_NOACTIVATE
+        hdwp = user32.BeginDeferWindowPos(len(hwnds))
+        anterior = win32con.HWND_TOP
+        for hwnd in hwnds:
+            if hdwp:
+                hdwp = user32.DeferWindowPos(hdwp, hwnd, anterior, 0, 0, 0, 0, flags)
+            anterior = hwnd
+        if hdwp:
+            user32.EndDeferWindowPos(hdwp)
+
+        if hwnds:
+            try:
+                win32gui.SetForegroundWindow(hwnds[0])
+            except Exception:
+                pass  # Windows puede denegar el foco si otra app lo tiene
+
+
+class RastreadorCarpetas:
+    """Ubicación de cada ventana del Explorador, cacheada por hwnd.
+
+    Solo se consulta al shell (en un lote por escaneo) por las ventanas
+    nuevas, las que cambiaron de título (navegaron) o las que llevan más de
+    REVALIDAR_CARPETAS sin consultarse.
+    """
+
+    def __init__(self):
+        self.cache = {}  # {hwnd: (titulo, carpeta normalizada, instante)}
+        self.lock = threading.Lock()  # El escaneo corre en el ejecutor del núcleo
+        self.consultas = 0
+
+    def completar(self, ventanas, backend):
+        """Retorna las ventanas con el campo carpeta relleno para las del Explorador"""
+        ahora = time.monotonic()
+        exploradores = {v.hwnd: v for v in ventanas if v.clase in CLASES_EXPLORADOR}
+        with self.lock:
+            pendientes = []
+            for hwnd, ventana in exploradores.items():
+                cacheada = self.cache.get(hwnd)
+                if (cacheada is None or cacheada[0] != ventana.titulo
+                        or ahora - cacheada[2] > REVALIDAR_CARPETAS):
+                    pendientes.append(hwnd)
+            if pendientes:
+                self.consultas += 1
+                try:
+                    ubicaciones = backend.consultar_carpetas(pendientes)
+                except Exception:
+                    ubicaciones = {}
+                for hwnd in pendientes:
+                    carpeta = normalizar_ruta(ubicaciones.get(hwnd, ""))
+                    self.cache[hwnd] = (exploradores[hwnd].titulo, carpeta, ahora)
+
+            # Olvidar ventanas cerradas
+            for hwnd in [h for h in self.cache if h not in exploradores]:
+                del self.cache[hwnd]
+
+            if not exploradores:
+                return ventanas
+            return [v._replace(carpeta=self.cache[v.hwnd][1]) if v.hwnd in exploradores else v
+                    for v in ventanas]
+
+
+# Backend activo; las pruebas lo sustituyen con usar_backend()
+backend_ventanas = BackendWin32()
+rastreador_carpetas = RastreadorCarpetas()
+
+
+def usar_backend(backend):
+    """Sustituye el backend de ventanas (p.ej. simulacion.BackendSimulado)"""
+    global backend_ventanas, rastreador_carpetas
+    backend_ventanas = backend
+    rastreador_carpetas = RastreadorCarpetas()
+
+
+def enumerar_ventanas():
+    """Lista las ventanas visibles con título (y ubicación de las del Explorador)"""
+    return rastreador_carpetas.completar(backend_ventanas.enumerar(), backend_ventanas)
+
+
+def emparejar_ventanas(ventanas, archivos_config, carpetas_conocidas=()):
+    """Asocia cada archivo configurado con su ventana.
+
+    Carpetas: ventana del Explorador cuya ubicación es ese path.
+    Archivos: ventana (no del Explorador) cuyo título empieza por su nombre;
+    los paths en carpetas_conocidas no se emparejan por título.
+    Retorna {path: Ventana}. Si varias ventanas coinciden gana la última.
+    """
+    # Prefijos de cada archivo calculados una sola vez por escaneo
+    prefijos = []
+    for archivo in archivos_config:
+        if archivo["path"] in carpetas_conocidas:
+            continue
+        # ntpath: los paths son de Windows también al reproducir trazas en Linux
+        nombre_archivo = ntpath.basename(archivo["path"]).lower()
+        nombre_sin_ext = ntpath.splitext(nombre_archivo)[0]
+        # Ej: "adjunto.txt - Notepad++" o "adjunto - Bloc de notas"
+        prefijos.append((archivo["path"], (
+            nombre_archivo,
+            nombre_sin_ext + " ",
+            nombre_sin_ext + "-",
+            "*" + nombre_archivo,
+            "*" + nombre_sin_ext,
+        )))
+
+    archivos_abiertos = {}
+    carpetas = {}  # {carpeta normalizada: Ventana}
+    for ventana in ventanas:
+        if ventana.clase in CLASES_EXPLORADOR:
+            if ventana.carpeta:
+                carpetas[ventana.carpeta] = ventana
+            continue
+        titulo_lower = ventana.titulo.lower()
+        for path, candidatos in prefijos:
+            if titulo_lower.startswith(candidatos):
+                archivos_abiertos[path] = ventana
+
+    if carpetas:
+        for archivo in archivos_config:
+            ventana = carpetas.get(normalizar_ruta(archivo["path"]))
+            if ventana:
+                archivos_abiertos[archivo["path"]] = ventana
+    return archivos_abiertos
+
+
+def ventana_sigue_viva(ventana):
+    """Comprueba con el backend activo si una ventana del snapshot sigue existiendo"""
+    return backend_ventanas.sigue_viva(ventana)
+
+
 class BarraArchivos(QWidget):
     # Referencia global al gestor para acceder a grupos
     gestor = None
 
-    def __init__(self, nombre_barra, archivos_config, color_borde=None, barra_index=0):
+    def __init__(self, nombre_barra, archivos_config, color_borde=None, barra_index=0,
+                 ventanas_iniciales=None, barra_id=None):
         super().__init__()
+        self.barra_id = barra_id
         self.nombre_barra = nombre_barra
         self.archivos_config = archivos_config
         self.color_borde = color_borde or generar_color_unico(barra_index)
         self.barra_index = barra_index
-        self.ventanas_abiertas = {}
+        self.ventanas_abiertas = {}  # {path: hwnd}
+        self.ventanas_info = {}  # {path: Ventana}
         self.drag_position = None
 
         self.init_ui()
-        self.init_monitor()
+        self.init_monitor(ventanas_iniciales)
 
     def init_ui(self):
         self.setWindowTitle(self.nombre_barra)
@@ -139,6 +423,9 @@ class BarraArchivos(QWidget):
         margin = int(BASE_CONTAINER_MARGIN * scale)
         self.layout.setContentsMargins(margin, margin, margin, margin)
         self.setLayout(self.layout)
+        # Tamaño de barra vacía: una barra oculta que aún no se ha mostrado
+        # conserva en su grupo este hueco, no el tamaño por defecto de Qt
+        self.adjustSize()
 
         self.botones = {}
 
@@ -183,38 +470,29 @@ class BarraArchivos(QWidget):
             }}
         """)
 
-    def init_monitor(self):
-        """Monitorea cada 2 segundos qué archivos están abiertos"""
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.actualizar_estado)
-        self.timer.start(2000)
-        self.actualizar_estado()
-
-    def actualizar_estado(self):
-        """Detecta qué archivos configurados están abiertos"""
-        archivos_abiertos = {}
-
-        def callback(hwnd, _):
-            if win32gui.IsWindowVisible(hwnd):
-                titulo = win32gui.GetWindowText(hwnd)
-                if titulo:
-                    titulo_lower = titulo.lower()
-                    for archivo in self.archivos_config:
-                        nombre_archivo = os.path.basename(archivo["path"])
-                        nombre_sin_ext = os.path.splitext(nombre_archivo)[0]
-                        # Buscar nombre al inicio del título (más preciso)
-                        # Ej: "adjunto.txt - Notepad++" o "adjunto - Bloc de notas"
-                        if (titulo_lower.startswith(nombre_archivo.lower()) or
-                            titulo_lower.startswith(nombre_sin_ext.lower() + " ") or
-                            titulo_lower.startswith(nombre_sin_ext.lower() + "-") or
-                            titulo_lower.startswith("*" + nombre_archivo.lower()) or
-                            titulo_lower.startswith("*" + nombre_sin_ext.lower())):
-                            archivos_abiertos[archivo["path"]] = hwnd
-            return True
+    def init_monitor(self, ventanas_iniciales=None):
+        """Estado inicial de la barra.
 
-        win32gui.EnumWindows(callback, None)
+        Con ventanas_iniciales (del snapshot) se pintan botones provisionales
+        sin escanear. El escaneo periódico lo hace el gestor (uno para todas
+        las barras) y llega por aplicar_ventanas().
+        """
+        if ventanas_iniciales:
+            self.ventanas_info = dict(ventanas_iniciales)
+            self.ventanas_abiertas = {p: v.hwnd for p, v in self.ventanas_info.items()}
+        self.actualizar_botones()
 
-        self.ventanas_abiertas = archivos_abiertos
+    def aplicar_ventanas(self, ventanas):
+        """Empareja una lista de ventanas con los archivos y refresca botones"""
+        carpetas = BarraArchivos.gestor.carpetas_conocidas if BarraArchivos.gestor else ()
+        info = emparejar_ventanas(ventanas, self.archivos_config, carpetas)
+        if BarraArchivos.gestor:
+            if info != self.ventanas_info:
+                BarraArchivos.gestor.snapshot_pendiente = True
+            BarraArchivos.gestor.recientes.aplicar(self.ventanas_info, info,
+                                                   backend_ventanas.ventana_activa())
+        self.ventanas_info = info
+        self.ventanas_abiertas = {p: v.hwnd for p, v in info.items()}
         self.actualizar_botones()
 
     def actualizar_botones(self):
@@ -227,9 +505,6 @@ class BarraArchivos(QWidget):
             btn.deleteLater()
         self.botones.clear()
 
-        # Procesar eventos pendientes para asegurar limpieza
-        QApplication.processEvents()
-
         archivos_ordenados = sorted(
             [a for a in self.archivos_config if a["path"] in self.ventanas_abiertas],
             key=lambda x: x.get("orden", 999)
@@ -274,7 +549,12 @@ class BarraArchivos(QWidget):
             """)
             btn.clicked.connect(lambda checked, p=path: self.toggle_ventana(p))
             self.layout.addWidget(btn)
+            # Visible ya: si no, adjustSize() no lo cuenta y la barra encoge hasta
+            # la siguiente vuelta del bucle (y el grupo se recolocaría dos veces)
+            btn.show()
             self.botones[path] = btn
+            self.marcar_disponibilidad(path)
+            self.poner_icono(path)
 
         if self.botones:
             self.adjustSize()
@@ -282,18 +562,84 @@ class BarraArchivos(QWidget):
         else:
             self.hide()
 
+    def marcar_disponibilidad(self, path):
+        """Marca el botón si el archivo no existe o su recurso no responde"""
+        btn = self.botones.get(path)
+        if btn is None:
+            return
+        estado = None
+        if BarraArchivos.gestor and hasattr(BarraArchivos.gestor, 'verificador'):
+            estado = BarraArchivos.gestor.verificador.estado(path)
+        prefijo, nota = marca_disponibilidad(estado)
+        btn.setText(prefijo + os.path.basename(path))
+        btn.setToolTip(f"{path}\n{nota}" if nota else path)
+
+    def poner_icono(self, path):
+        """Icono de la aplicación desde la caché (si aún no está, llega con aplicar_iconos)"""
+        btn = self.botones.get(path)
+        ventana = self.ventanas_info.get(path)
+        if btn is None or ventana is None or not BarraArchivos.gestor:
+            return
+        tamano = int(BASE_ICON_SIZE * self.get_scale())
+        icono = BarraArchivos.gestor.iconos.icono(ventana, tamano)
+        if icono is not None:
+            btn.setIcon(icono)
+            btn.setIconSize(QSize(tamano, tamano))
+
+    def aplicar_iconos(self):
+        """Pone los iconos que acaban de llegar a la caché sin reconstruir los botones"""
+        for path in self.botones:
+            self.poner_icono(path)
+
     def toggle_ventana(self, path):
-        """Minimiza o restaura la ventana del archivo"""
-        hwnd = self.ventanas_abiertas.get(path)
-        if not hwnd:
+        """Minimiza o restaura la ventana del archivo.
+
+        El estado minimizado sale de la caché del último escaneo (sin
+        GetWindowPlacement por click) y se actualiza al momento.
+        """
+        ventana = self.ventanas_info.get(path)
+        if not ventana:
             return
 
-        placement = win32gui.GetWindowPlacement(hwnd)
-        if placement[1] == win32con.SW_SHOWMINIMIZED:
-            win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-            win32gui.SetForegroundWindow(hwnd)
+        if ventana.minimizada:
+            backend_ventanas.restaurar(ventana.hwnd)
+            if BarraArchivos.gestor:
+                BarraArchivos.gestor.recientes.usar(path)
         else:
-            win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
+            backend_ventanas.minimizar(ventana.hwnd)
+        self.ventanas_info[path] = ventana._replace(minimizada=not ventana.minimizada)
+
+    def ventanas_en_orden(self):
+        """Paths abiertos en el orden configurado"""
+        return [a["path"] for a in sorted(self.archivos_config, key=lambda x: x.get("orden", 999))
+                if a["path"] in self.ventanas_info]
+
+    def minimizar_todo(self):
+        """Minimiza de una vez todas las ventanas abiertas de la barra"""
+        paths = self.ventanas_en_orden()
+        backend_ventanas.minimizar_lote([self.ventanas_info[p].hwnd for p in paths])
+        for p in paths:
+            self.ventanas_info[p] = self.ventanas_info[p]._replace(minimizada=True)
+
+    def restaurar_todo(self):
+        """Restaura de una vez todas las ventanas y las apila según 'orden'"""
+        paths = self.ventanas_en_orden()
+        backend_ventanas.restaurar_lote(
+            [self.ventanas_info[p].hwnd for p in paths],
+            [self.ventanas_info[p].hwnd for p in paths if self.ventanas_info[p].minimizada])
+        for p in paths:
+            self.ventanas_info[p] = self.ventanas_info[p]._replace(minimizada=False)
+
+    def contextMenuEvent(self, event):
+        """Click derecho: acciones sobre todas las ventanas de la barra"""
+        menu = QMenu(self)
+        accion_minimizar = menu.addAction("Minimizar todo")
+        accion_restaurar = menu.addAction("Restaurar todo")
+        accion = menu.exec_(event.globalPos())
+        if accion == accion_minimizar:
+            self.minimizar_todo()
+        elif accion == accion_restaurar:
+            self.restaurar_todo()
 
     def mousePressEvent(self, event):
         """Permite arrastrar la barra"""
@@ -328,13 +674,58 @@ class BarraArchivos(QWidget):
                 BarraArchivos.gestor.verificar_snap_y_acoplamiento(self)
             event.accept()
 
+    def resizeEvent(self, event):
+        """El grupo acoplado se recoloca (una vez por vuelta del bucle)"""
+        super().resizeEvent(event)
+        if BarraArchivos.gestor:
+            BarraArchivos.gestor.programar_disposicion(self)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if BarraArchivos.gestor:
+            BarraArchivos.gestor.programar_disposicion(self)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if BarraArchivos.gestor:
+            BarraArchivos.gestor.programar_disposicion(self)
+
 
 class GestorBarras(QWidget):
     def __init__(self):
         super().__init__()
         self.barras = []
         self.grupos_acoplados = []  # [[barra1, barra2], [barra3]]
+        self.barras_redimensionadas = set()  # Barras cuyo grupo hay que recolocar
+        self.disposicion_programada = False
+        self.snapshot_pendiente = False
+        self.escaneo_confirmado = False  # Primer escaneo real hecho (el snapshot era provisional)
+        self.grabadora = None  # GrabadoraTrazas activa (comando IPC "grabar")
+
+        # Bucle asyncio + ejecutor compartido para todo el trabajo en segundo plano
+        self.nucleo = Nucleo()
+
+        self.almacen = crear_almacen(CONFIG_FILE, CONFIG_DB)
+        self.bloqueo_almacen = threading.Lock()  # Una escritura a la vez desde el ejecutor
+        self.cambios_pendientes = []  # Cambios de config aún no guardados
+        self.cambios_en_vuelo = []  # Lote que se está escribiendo en el ejecutor
+        self.copias_barras = {}  # {barra_id: copia del último guardado}, ver copiar_config()
+        self.bloqueo_snapshot = threading.Lock()
+        self.tarea_guardado = None
         self.config = self.cargar_config()
+        self.siguiente_id = max_id(self.config) + 1
+
+        # Índices para no buscar barras recorriendo listas
+        self.config_por_id = {b["id"]: b for b in self.config["barras"]}
+        self.barras_por_id = {}
+        self.id_por_nombre = {}
+        for barra_config in self.config["barras"]:
+            self.id_por_nombre.setdefault(barra_config["nombre"], barra_config["id"])
+
+        # Índice de búsqueda del listado (se mantiene en cada alta, renombrado y baja)
+        self.indice_busqueda = IndiceBusqueda()
+        for barra_config in self.config["barras"]:
+            self.indexar_barra(barra_config)
 
         # Establecer referencia global
         BarraArchivos.gestor = self
@@ -343,22 +734,158 @@ class GestorBarras(QWidget):
         self.local_server = QLocalServer(self)
         self.local_server.newConnection.connect(self.nueva_conexion_local)
         # Limpiar servidor anterior si quedó bloqueado
-        QLocalServer.removeServer("BarrasTareasApp")
-        self.local_server.listen("BarrasTareasApp")
+        QLocalServer.removeServer(NOMBRE_SERVIDOR)
+        self.local_server.listen(NOMBRE_SERVIDOR)
 
         # Obtener área de trabajo (excluye taskbar)
         self.obtener_area_trabajo()
 
+        # Existencia de archivos en segundo plano (rutas de red pueden colgarse)
+        self.verificador = VerificadorArchivos(self.nucleo, self)
+        self.verificador.cambiado.connect(self.disponibilidad_cambiada)
+        self.verificador.error_apertura.connect(self.mostrar_error_apertura)
+        self.botones_listado = {}  # {path: [QPushButton]}
+        # Recuadros del listado, creados una vez por barra: {barra_id: (QFrame, QLabel, {archivo_id: QPushButton})}
+        self.recuadros_listado = {}
+        self.orden_listado = []  # barra_ids en el orden actual del layout del listado
+        self.carpetas_conocidas = set()  # Paths que el verificador sabe que son carpetas
+
+        # Archivos abiertos por orden de uso (los escaneos de las barras lo mantienen)
+        self.recientes = IndiceRecientes()
+
+        # Iconos de aplicación de los botones (extraídos en segundo plano)
+        self.iconos = CacheIconos(ICONOS_DIR, self.nucleo.ejecutor, self)
+        self.iconos.listo.connect(lambda: [barra.aplicar_iconos() for barra in self.barras])
+
         self.init_ui()
         self.crear_barras()
 
+        # Selector rápido con atajo global (solo en Windows)
+        self.selector = SelectorRapido(self.recientes)
+        self.selector.elegido.connect(self.activar_reciente)
+        self.atajo_selector = AtajoGlobal(self.mostrar_selector, *ATAJO_SELECTOR)
+
+        # Tareas periódicas del núcleo (el primer escaneo confirma el snapshot
+        # sin bloquear el arranque)
+        self.nucleo.periodica("escaneo", self.escanear, INTERVALO_MONITOR / 1000,
+                              timeout=TIMEOUT_ESCANEO)
+        self.nucleo.periodica("verificacion", lambda: self.verificador.comprobar(self.todos_los_paths()),
+                              TTL_VERIFICACION / 2)
+        self.nucleo.periodica("snapshot", self.guardar_snapshot_si_cambio, INTERVALO_SNAPSHOT / 1000)
+
+    async def escanear(self):
+        """Un escaneo de ventanas (en el ejecutor) aplicado a todas las barras"""
+        ventanas = await self.nucleo.en_hilo(enumerar_ventanas)
+        if self.grabadora:
+            self.grabadora.registrar(ventanas)
+        for barra in list(self.barras):
+            barra.aplicar_ventanas(ventanas)
+        if not self.escaneo_confirmado:
+            self.escaneo_confirmado = True
+            self.nucleo.lanzar("snapshot", self.volcar_snapshot())
+
     def nueva_conexion_local(self):
-        """Otra instancia quiere abrir el gestor"""
+        """Otra instancia envía comandos (uno por línea)"""
         socket = self.local_server.nextPendingConnection()
         if socket:
+            self.nucleo.lanzar("ipc", self.atender_conexion(socket))
+
+    async def atender_conexion(self, socket):
+        """Responde a los comandos de una conexión hasta que se cierra o pasa
+        TIMEOUT_IPC sin recibir nada"""
+        try:
+            while socket.state() == QLocalSocket.ConnectedState:
+                while socket.canReadLine():
+                    linea = bytes(socket.readLine()).decode('utf-8').strip()
+                    if linea:
+                        respuesta = self.ejecutar_comando(linea)
+                        socket.write((respuesta + "\n").encode('utf-8'))
+                await esperar_senal(socket.readyRead, socket.disconnected, timeout=TIMEOUT_IPC)
+        except asyncio.TimeoutError:
+            pass  # Cliente inactivo
+        finally:
+            socket.disconnectFromServer()
             socket.deleteLater()
-        self.mostrar_gestor()
 
+    def ejecutar_comando(self, linea):
+        """Ejecuta un comando IPC y retorna la respuesta ("ok" o "error ...").
+
+        mostrar                  abre el gestor
+        selector                 abre el selector rápido de archivos abiertos
+        estadisticas             estadísticas de las tareas del núcleo (JSON tras "ok ")
+        grabar <ruta>            graba los escaneos en una traza (ver trazas.py)
+        grabar_anonimo <ruta>    igual, con títulos y paths anonimizados
+        detener_grabacion        cierra la traza en curso
+        minimizar <barra>|*      minimiza todas las ventanas de la barra (o de todas)
+        restaurar <barra>|*      restaura y ordena las ventanas de la barra (o de todas)
+        """
+        comando, _, argumento = linea.partition(" ")
+        if comando == "mostrar":
+            self.mostrar_gestor()
+            return "ok"
+        if comando == "selector":
+            self.mostrar_selector()
+            return "ok"
+        if comando == "estadisticas":
+            return "ok " + json.dumps(self.nucleo.estadisticas(), ensure_ascii=False)
+        if comando in ("grabar", "grabar_anonimo"):
+            if not argumento:
+                return "error falta la ruta de la traza"
+            self.detener_grabacion()
+            try:
+                self.grabadora = GrabadoraTrazas(argumento, self.config, comando == "grabar_anonimo")
+            except OSError as e:
+                return f"error {e}"
+            return "ok"
+        if comando == "detener_grabacion":
+            if not self.grabadora:
+                return "error no hay ninguna grabación en curso"
+            escaneos = self.grabadora.escaneos
+            self.detener_grabacion()
+            return f"ok {escaneos} escaneos grabados"
+        if comando in ("minimizar", "restaurar"):
+            if argumento == "*":
+                barras = self.barras
+            elif argumento in self.id_por_nombre:
+                barras = [self.buscar_barra(argumento)[1]]
+            else:
+                return f"error barra desconocida: {argumento}"
+            for barra in barras:
+                if comando == "minimizar":
+                    barra.minimizar_todo()
+                else:
+                    barra.restaurar_todo()
+            return "ok"
+        return f"error comando desconocido: {comando}"
+
+    def mostrar_gestor(self):
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+    def detener_grabacion(self):
+        if self.grabadora:
+            self.grabadora.cerrar()
+            self.grabadora = None
+
+    def mostrar_selector(self):
+        self.selector.mostrar(backend_ventanas.ventana_activa())
+
+    def activar_reciente(self, path, hwnd):
+        """Trae al frente el archivo elegido en el selector (hwnd ya conocido, sin escanear).
+
+        Solo se restaura si el último escaneo la vio minimizada: SW_RESTORE
+        desmaximizaría una ventana maximizada.
+        """
+        cacheadas = [(barra, barra.ventanas_info[path]) for barra in self.barras
+                     if path in barra.ventanas_info and barra.ventanas_info[path].hwnd == hwnd]
+        if any(ventana.minimizada for _, ventana in cacheadas):
+            backend_ventanas.restaurar(hwnd)
+        else:
+            backend_ventanas.activar(hwnd)
+        self.recientes.usar(path)
+        for barra, ventana in cacheadas:
+            barra.ventanas_info[path] = ventana._replace(minimizada=False)
 
     def obtener_area_trabajo(self):
         """Obtiene el área de trabajo del monitor principal"""
@@ -408,6 +935,13 @@ class GestorBarras(QWidget):
                 border: none;
                 background-color: #252530;
             }
+            QLineEdit {
+                background-color: #2d2d3a;
+                border: 1px solid #0078d4;
+                border-radius: 4px;
+                padding: 6px;
+                font-size: 13px;
+            }
         """)
 
         main_layout = QVBoxLayout()
@@ -471,6 +1005,17 @@ class GestorBarras(QWidget):
         listado_label.setStyleSheet("font-weight: bold; margin-top: 10px;")
         main_layout.addWidget(listado_label)
 
+        # Búsqueda por nombre de archivo, ruta o barra (filtra al teclear)
+        self.busqueda = QLineEdit()
+        self.busqueda.setPlaceholderText("Buscar archivo, ruta o barra...")
+        self.busqueda.setClearButtonEnabled(True)
+        self.temporizador_busqueda = QTimer(self)
+        self.temporizador_busqueda.setSingleShot(True)
+        self.temporizador_busqueda.setInterval(RETARDO_BUSQUEDA)
+        self.temporizador_busqueda.timeout.connect(self.actualizar_listado_barras)
+        self.busqueda.textChanged.connect(lambda _: self.temporizador_busqueda.start())
+        main_layout.addWidget(self.busqueda)
+
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setMinimumHeight(250)
@@ -480,6 +1025,10 @@ class GestorBarras(QWidget):
         self.listado_layout = QVBoxLayout()
         self.listado_layout.setAlignment(Qt.AlignTop)
         self.listado_widget.setLayout(self.listado_layout)
+        self.sin_resultados = QLabel("  Sin resultados")
+        self.sin_resultados.setStyleSheet("color: #888888;")
+        self.sin_resultados.hide()
+        self.listado_layout.addWidget(self.sin_resultados)
 
         self.scroll_area.setWidget(self.listado_widget)
         main_layout.addWidget(self.scroll_area)
@@ -490,81 +1039,183 @@ class GestorBarras(QWidget):
         self.actualizar_listado_barras()
 
     def actualizar_listado_barras(self):
-        """Actualiza el panel con el listado de barras y sus archivos"""
-        # Limpiar listado existente
-        while self.listado_layout.count():
-            child = self.listado_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
-        for barra_config in self.config.get("barras", []):
-            # Contenedor para cada barra
-            barra_frame = QFrame()
-            barra_frame.setStyleSheet("""
-                QFrame {
-                    background-color: #2d2d3a;
-                    border: 1px solid #0078d4;
-                    border-radius: 6px;
-                    margin: 4px;
-                    padding: 8px;
-                }
+        """Muestra en el listado las barras y archivos que coinciden con la búsqueda.
+
+        Los recuadros y botones se crean una vez por barra; filtrar solo los
+        muestra, oculta y reordena (recrearlos en cada tecla era lo lento).
+        """
+        consulta = self.busqueda.text().strip()
+        if not consulta:
+            visibles = {b["id"]: None for b in self.config.get("barras", [])}
+        else:
+            # Agrupar resultados por barra, en orden de relevancia.
+            # None = la barra coincide por nombre: se muestran todos sus archivos
+            visibles = {}
+            for clave, _ in self.indice_busqueda.buscar(consulta, LIMITE_RESULTADOS):
+                if clave[0] == "barra":
+                    visibles[clave[1]] = None
+                else:
+                    ids = visibles.setdefault(clave[1], set())
+                    if ids is not None:
+                        ids.add(clave[2])
+
+        self.listado_widget.setUpdatesEnabled(False)
+        for barra_id in list(self.recuadros_listado):
+            if barra_id not in self.config_por_id:
+                self.quitar_recuadro_barra(barra_id)  # Barra eliminada
+
+        for barra_id, ids in visibles.items():
+            barra_config = self.config_por_id[barra_id]
+            if barra_id not in self.recuadros_listado:
+                self.crear_recuadro_barra(barra_config)
+            recuadro, nombre_label, botones = self.recuadros_listado[barra_id]
+            nombre_label.setText(f"  {barra_config['nombre']}")
+            for archivo_id, btn in botones.items():
+                mostrar = ids is None or archivo_id in ids
+                if btn.isHidden() == mostrar:
+                    btn.setVisible(mostrar)
+            if recuadro.isHidden():
+                recuadro.show()
+        for barra_id, (recuadro, _, _) in self.recuadros_listado.items():
+            if barra_id not in visibles and not recuadro.isHidden():
+                recuadro.hide()
+
+        # Reordenar el layout solo si cambia el orden (los ocultos, al final)
+        orden = list(visibles) + [i for i in self.orden_listado if i not in visibles and i in self.recuadros_listado]
+        if orden != self.orden_listado:
+            for barra_id in self.orden_listado:
+                if barra_id in self.recuadros_listado:
+                    self.listado_layout.removeWidget(self.recuadros_listado[barra_id][0])
+            for barra_id in orden:
+                self.listado_layout.addWidget(self.recuadros_listado[barra_id][0])
+            self.orden_listado = orden
+        self.sin_resultados.setVisible(not visibles)
+        self.listado_widget.setUpdatesEnabled(True)
+
+    def quitar_recuadro_barra(self, barra_id):
+        """Destruye el recuadro (barra eliminada o con archivos nuevos: se recrea al mostrarse)"""
+        if barra_id not in self.recuadros_listado:
+            return
+        recuadro, _, botones = self.recuadros_listado.pop(barra_id)
+        for btn in botones.values():
+            path = btn.property("path")
+            lista = self.botones_listado.get(path, [])
+            if btn in lista:
+                lista.remove(btn)
+            if not lista:
+                self.botones_listado.pop(path, None)
+        self.listado_layout.removeWidget(recuadro)
+        recuadro.deleteLater()
+        self.orden_listado.remove(barra_id)
+
+    def crear_recuadro_barra(self, barra_config):
+        """Crea el recuadro de una barra con todos sus archivos (se añade al layout al ordenar)"""
+        # Contenedor para cada barra
+        barra_frame = QFrame()
+        barra_frame.setStyleSheet("""
+            QFrame {
+                background-color: #2d2d3a;
+                border: 1px solid #0078d4;
+                border-radius: 6px;
+                margin: 4px;
+                padding: 8px;
+            }
+        """)
+        barra_layout = QVBoxLayout()
+        barra_layout.setContentsMargins(8, 8, 8, 8)
+        barra_layout.setSpacing(4)
+
+        # Nombre de la barra
+        nombre_label = QLabel(f"  {barra_config['nombre']}")
+        nombre_label.setStyleSheet("font-weight: bold; font-size: 13px; color: #0078d4;")
+        barra_layout.addWidget(nombre_label)
+
+        # Archivos de la barra
+        botones = {}
+        for archivo in barra_config.get("archivos", []):
+            path = archivo["path"]
+            nombre = os.path.basename(path)
+            color = archivo.get("color", "#3d3d3d")
+
+            # Convertir HSL a hex para el botón
+            bg_color = hsl_to_hex(color) if color.startswith("hsl") else color
+            texto_color = color_contraste(color) if color.startswith("hsl") else "#ffffff"
+
+            btn_archivo = QPushButton(f"  {nombre}")
+            btn_archivo.setStyleSheet(f"""
+                QPushButton {{
+                    background-color: {bg_color};
+                    color: {texto_color};
+                    border: none;
+                    padding: 6px 12px;
+                    margin: 2px 0;
+                    border-radius: 4px;
+                    text-align: left;
+                    font-size: 12px;
+                }}
+                QPushButton:hover {{
+                    opacity: 0.8;
+                    border: 1px solid white;
+                }}
             """)
-            barra_layout = QVBoxLayout()
-            barra_layout.setContentsMargins(8, 8, 8, 8)
-            barra_layout.setSpacing(4)
-
-            # Nombre de la barra
-            nombre_label = QLabel(f"  {barra_config['nombre']}")
-            nombre_label.setStyleSheet("font-weight: bold; font-size: 13px; color: #0078d4;")
-            barra_layout.addWidget(nombre_label)
-
-            # Archivos de la barra
-            for archivo in barra_config.get("archivos", []):
-                path = archivo["path"]
-                nombre = os.path.basename(path)
-                color = archivo.get("color", "#3d3d3d")
-
-                # Convertir HSL a hex para el botón
-                bg_color = hsl_to_hex(color) if color.startswith("hsl") else color
-                texto_color = color_contraste(color) if color.startswith("hsl") else "#ffffff"
-
-                btn_archivo = QPushButton(f"  {nombre}")
-                btn_archivo.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: {bg_color};
-                        color: {texto_color};
-                        border: none;
-                        padding: 6px 12px;
-                        margin: 2px 0;
-                        border-radius: 4px;
-                        text-align: left;
-                        font-size: 12px;
-                    }}
-                    QPushButton:hover {{
-                        opacity: 0.8;
-                        border: 1px solid white;
-                    }}
-                """)
-                btn_archivo.setToolTip(path)
-                btn_archivo.clicked.connect(lambda checked, p=path: self.abrir_archivo(p))
-                barra_layout.addWidget(btn_archivo)
-
-            barra_frame.setLayout(barra_layout)
-            self.listado_layout.addWidget(barra_frame)
+            btn_archivo.setProperty("path", path)
+            btn_archivo.clicked.connect(lambda checked, p=path: self.abrir_archivo(p))
+            barra_layout.addWidget(btn_archivo)
+            botones[archivo["id"]] = btn_archivo
+            self.botones_listado.setdefault(path, []).append(btn_archivo)
+            self.marcar_listado(path)
+
+        barra_frame.setLayout(barra_layout)
+        barra_frame.hide()
+        self.recuadros_listado[barra_config["id"]] = (barra_frame, nombre_label, botones)
+        self.orden_listado.append(barra_config["id"])
+        self.listado_layout.addWidget(barra_frame)
+
+    def marcar_listado(self, path):
+        """Actualiza texto y tooltip de los botones del listado según disponibilidad"""
+        estado = self.verificador.estado(path)
+        prefijo, nota = marca_disponibilidad(estado)
+        tooltip = path
+        if estado and estado.mtime:
+            tooltip += "\nModificado: " + time.strftime("%Y-%m-%d %H:%M", time.localtime(estado.mtime))
+        if nota:
+            tooltip += f"\n{nota}"
+        for btn in self.botones_listado.get(path, []):
+            btn.setText(f"  {prefijo}{os.path.basename(path)}")
+            btn.setToolTip(tooltip)
+
+    def disponibilidad_cambiada(self, path, estado):
+        """El verificador tiene un resultado nuevo para path"""
+        if estado.es_carpeta:
+            self.carpetas_conocidas.add(path)
+        elif estado.estado == DISPONIBLE:
+            self.carpetas_conocidas.discard(path)
+        self.marcar_listado(path)
+        for barra in self.barras:
+            barra.marcar_disponibilidad(path)
+
+    def todos_los_paths(self):
+        return [a["path"] for b in self.config["barras"] for a in b["archivos"]]
 
     def abrir_archivo(self, path):
-        """Abre un archivo o carpeta con la aplicación predeterminada"""
-        try:
-            os.startfile(path)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"No se pudo abrir:\n{path}\n\n{e}")
+        """Abre un archivo o carpeta con la aplicación predeterminada (sin bloquear la GUI)"""
+        estado = self.verificador.estado(path)
+        if not self.verificador.disponible(path):
+            _, nota = marca_disponibilidad(estado)
+            QMessageBox.warning(self, "Error", f"No se pudo abrir:\n{path}\n\n{nota}")
+            self.verificador.comprobar([path], forzar=True)
+            return
+        self.verificador.abrir(path)
+
+    def mostrar_error_apertura(self, path, mensaje):
+        QMessageBox.warning(self, "Error", f"No se pudo abrir:\n{path}\n\n{mensaje}")
 
     def cambiar_escala(self, value):
         """Actualiza la escala y refresca todas las barras"""
         escala = value / 10.0
         self.config['escala'] = escala
         self.scale_label.setText(f"Escala: {escala:.1f}x")
-        self.guardar_config()
+        self.guardar_config(("ajuste", "escala"))
 
         # Actualizar todas las barras
         for barra in self.barras:
@@ -574,33 +1225,34 @@ class GestorBarras(QWidget):
             barra.actualizar_botones()
 
     def cargar_config(self):
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # Migración: añadir colores si faltan
-                self.migrar_colores(config)
-                return config
-        return {"barras": [], "escala": DEFAULT_SCALE, "grupos": []}
+        config = self.almacen.cargar()
+        if config is None:
+            config = {"barras": [], "escala": DEFAULT_SCALE, "grupos": []}
+        # Migración: IDs estables y colores si faltan
+        modificado = asignar_ids(config)
+        modificado = self.migrar_colores(config) or modificado
+        if modificado:
+            self.almacen.guardar(config)
+        return config
 
     def migrar_colores(self, config):
-        """Añade/recalcula colores para máximo contraste entre archivos de misma barra"""
-        modificado = False
-
-        for i, barra in enumerate(config.get("barras", [])):
-            if "color_borde" not in barra:
-                barra["color_borde"] = generar_color_unico(i)
-                modificado = True
-
-            # Recalcular colores de archivos para máximo contraste
-            archivos = barra.get("archivos", [])
-            total = len(archivos)
-            hue_base = (i * 60) % 360  # Cada barra empieza en hue diferente
-
-            for j, archivo in enumerate(archivos):
-                nuevo_color = generar_color_archivo(j, total, hue_base)
-                if archivo.get("color") != nuevo_color:
-                    archivo["color"] = nuevo_color
-                    modificado = True
+        """Crea las paletas con los colores en uso y asigna color solo a lo que no tiene.
+
+        Los colores existentes no se tocan; los nuevos son los más alejados
+        (en CIELAB) de todos los usados, también entre barras distintas.
+        """
+        barras = config.get("barras", [])
+        archivos = [a for barra in barras for a in barra.get("archivos", [])]
+        self.paleta_barras = PaletaPerceptual(b.get("color_borde") for b in barras)
+        self.paleta_archivos = PaletaPerceptual(a.get("color") for a in archivos)
+
+        sin_borde = [b for b in barras if not b.get("color_borde")]
+        for barra, color in zip(sin_borde, self.paleta_barras.asignar(len(sin_borde))):
+            barra["color_borde"] = color
+        sin_color = [a for a in archivos if not a.get("color")]
+        for archivo, color in zip(sin_color, self.paleta_archivos.asignar(len(sin_color))):
+            archivo["color"] = color
+        modificado = bool(sin_borde or sin_color)
 
         if "escala" not in config:
             config["escala"] = DEFAULT_SCALE
@@ -610,45 +1262,177 @@ class GestorBarras(QWidget):
             config["grupos"] = []
             modificado = True
 
-        if modificado:
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+        return modificado
 
-    def guardar_config(self):
-        # Guardar grupos acoplados por nombre de barra
-        grupos_nombres = []
-        for grupo in self.grupos_acoplados:
-            nombres = [b.nombre_barra for b in grupo]
-            grupos_nombres.append(nombres)
-        self.config["grupos"] = grupos_nombres
+    def guardar_config(self, *cambios):
+        """Persiste los cambios indicados (ver almacen.py para los tipos de cambio).
+
+        No escribe al momento: los cambios se acumulan y volcar_config() los
+        guarda juntos en el ejecutor tras RETARDO_GUARDADO.
+        """
+        # Guardar grupos acoplados por ID de barra (sobreviven a renombrados)
+        self.config["grupos"] = [[b.barra_id for b in grupo] for grupo in self.grupos_acoplados]
+        if not cambios:
+            return
+        self.cambios_pendientes.extend(cambios)
+        if self.tarea_guardado is None or self.tarea_guardado.done():
+            self.tarea_guardado = self.nucleo.lanzar("guardar_config", self.volcar_config())
+
+    async def volcar_config(self):
+        await asyncio.sleep(RETARDO_GUARDADO)
+        while self.cambios_pendientes:
+            # Copia: la GUI puede seguir modificando el config durante la escritura
+            config, cambios = self.copiar_config(self.cambios_pendientes)
+            self.cambios_en_vuelo = self.cambios_pendientes
+            self.cambios_pendientes = []
+            try:
+                await self.nucleo.en_hilo(self.escribir_config, config, cambios, timeout=TIMEOUT_GUARDADO)
+            except asyncio.TimeoutError:
+                # Se reintenta con el siguiente guardado (la escritura es idempotente)
+                self.cambios_pendientes[:0] = self.cambios_en_vuelo
+                self.cambios_en_vuelo = []
+                raise
+            # Si se cancela al cerrar no se llega aquí: el lote sigue en
+            # cambios_en_vuelo y closeEvent lo reescribe
+            self.cambios_en_vuelo = []
+
+    def copiar_config(self, cambios):
+        """Copia del config y de los cambios para escribirlos en el ejecutor.
+
+        Solo se copian de nuevo las barras con cambios; las demás reutilizan
+        la copia del guardado anterior, que nadie modifica. Toda modificación
+        de una barra llega con su cambio ("barra" o "archivo").
+        """
+        for cambio in cambios:
+            if cambio[0] == "barra":
+                self.copias_barras.pop(cambio[1]["id"], None)
+            elif cambio[0] in ("archivo", "eliminar_barra"):
+                self.copias_barras.pop(cambio[1], None)
+        memo = {}  # Compartido: los cambios apuntan a las mismas copias que el config
+        barras = []
+        for barra_config in self.config["barras"]:
+            copia = self.copias_barras.get(barra_config["id"])
+            if copia is None:
+                copia = self.copias_barras[barra_config["id"]] = copy.deepcopy(barra_config, memo)
+            barras.append(copia)
+        config = {clave: copy.deepcopy(valor) for clave, valor in self.config.items() if clave != "barras"}
+        config["barras"] = barras
+        return config, copy.deepcopy(cambios, memo)
+
+    def escribir_config(self, config, cambios):
+        with self.bloqueo_almacen:
+            self.almacen.guardar_cambios(config, cambios)
+
+    def indexar_barra(self, barra_config):
+        """Añade (o reindexa) la barra y todos sus archivos en el índice de búsqueda"""
+        self.indice_busqueda.agregar(("barra", barra_config["id"]), barra_config["nombre"])
+        for archivo in barra_config["archivos"]:
+            self.indexar_archivo(barra_config["id"], archivo)
+
+    def indexar_archivo(self, barra_id, archivo):
+        self.indice_busqueda.agregar(("archivo", barra_id, archivo["id"]),
+                                     os.path.basename(archivo["path"]), archivo["path"])
+
+    def desindexar_barra(self, barra_config):
+        self.indice_busqueda.eliminar(("barra", barra_config["id"]))
+        for archivo in barra_config["archivos"]:
+            self.indice_busqueda.eliminar(("archivo", barra_config["id"], archivo["id"]))
+
+    def nuevo_id(self):
+        """ID estable para una barra o archivo nuevo"""
+        nuevo = self.siguiente_id
+        self.siguiente_id += 1
+        return nuevo
+
+    def buscar_barra(self, nombre):
+        """Retorna (barra_config, BarraArchivos) por nombre usando el índice"""
+        barra_id = self.id_por_nombre[nombre]
+        return self.config_por_id[barra_id], self.barras_por_id[barra_id]
+
+    def cargar_snapshot(self):
+        """Lee el último mapeo ventana-archivo, descartando procesos que ya no existen"""
+        try:
+            with open(ESTADO_FILE, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return {}
 
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
+        snapshot = {}
+        for path, v in datos.get("ventanas", {}).items():
+            try:
+                ventana = Ventana(int(v["hwnd"]), v["titulo"], int(v["pid"]), bool(v.get("minimizada")))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if ventana_sigue_viva(ventana):
+                snapshot[path] = ventana
+        return snapshot
+
+    def datos_snapshot(self):
+        """Mapeo actual ventana-archivo (solo datos: se escribe en otro hilo)"""
+        ventanas = {}
+        for barra in self.barras:
+            for path, v in barra.ventanas_info.items():
+                ventanas[path] = {"hwnd": v.hwnd, "titulo": v.titulo, "pid": v.pid,
+                                  "minimizada": v.minimizada}
+        return {"ventanas": ventanas}
+
+    def escribir_snapshot(self, datos):
+        """Escribe el snapshot (bloqueante); temporal + os.replace como el config"""
+        with self.bloqueo_snapshot:
+            temporal = ESTADO_FILE + ".tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, ensure_ascii=False)
+            os.replace(temporal, ESTADO_FILE)
+
+    def guardar_snapshot(self):
+        """Guarda el snapshot ya, en el hilo de la GUI (al cerrar: el bucle se detiene)"""
+        try:
+            self.escribir_snapshot(self.datos_snapshot())
+            self.snapshot_pendiente = False
+        except OSError:
+            pass
+
+    async def volcar_snapshot(self):
+        """Guarda el mapeo ventana-archivo para el próximo arranque, en el ejecutor"""
+        self.snapshot_pendiente = False
+        try:
+            await self.nucleo.en_hilo(self.escribir_snapshot, self.datos_snapshot(),
+                                      timeout=TIMEOUT_GUARDADO)
+        except (OSError, asyncio.TimeoutError):
+            self.snapshot_pendiente = True  # Se reintenta en la siguiente vuelta
+            raise
+
+    def guardar_snapshot_si_cambio(self):
+        if self.snapshot_pendiente:
+            return self.volcar_snapshot()
 
     def crear_barras(self):
+        snapshot = self.cargar_snapshot()
         for i, barra_config in enumerate(self.config.get("barras", [])):
+            provisionales = {
+                a["path"]: snapshot[a["path"]]
+                for a in barra_config["archivos"] if a["path"] in snapshot
+            }
             barra = BarraArchivos(
                 barra_config["nombre"],
                 barra_config["archivos"],
                 barra_config.get("color_borde"),
-                i
+                i,
+                provisionales,
+                barra_id=barra_config["id"]
             )
             if "posicion" in barra_config:
                 barra.move(barra_config["posicion"]["x"], barra_config["posicion"]["y"])
             self.barras.append(barra)
+            self.barras_por_id[barra.barra_id] = barra
 
         # Restaurar grupos acoplados desde config
         self.restaurar_grupos()
 
     def restaurar_grupos(self):
         """Restaura grupos acoplados desde la configuración"""
-        for grupo_nombres in self.config.get("grupos", []):
-            grupo = []
-            for nombre in grupo_nombres:
-                for barra in self.barras:
-                    if barra.nombre_barra == nombre:
-                        grupo.append(barra)
-                        break
+        for grupo_ids in self.config.get("grupos", []):
+            grupo = [self.barras_por_id[i] for i in grupo_ids if i in self.barras_por_id]
             if len(grupo) > 1:
                 self.grupos_acoplados.append(grupo)
 
@@ -659,6 +1443,38 @@ class GestorBarras(QWidget):
                 return grupo
         return [barra]
 
+    def programar_disposicion(self, barra):
+        """Marca el grupo de la barra para recolocarlo al terminar la vuelta
+        actual del bucle: los cambios de tamaño de un escaneo (todas las
+        barras) se juntan en una sola pasada"""
+        self.barras_redimensionadas.add(barra)
+        if not self.disposicion_programada and not self.nucleo.bucle.is_closed():
+            self.disposicion_programada = True
+            self.nucleo.bucle.call_soon(self.recolocar_grupos)
+
+    def recolocar_grupos(self):
+        """Empaqueta los grupos con alguna barra redimensionada y mueve de una
+        vez solo las barras cuya posición cambia"""
+        self.disposicion_programada = False
+        redimensionadas = self.barras_redimensionadas
+        self.barras_redimensionadas = set()
+
+        movimientos = []
+        for grupo in self.grupos_acoplados:
+            if redimensionadas.isdisjoint(grupo):
+                continue
+            cajas = [Caja(b.x(), b.y(), b.width(), b.height()) for b in grupo]
+            posiciones = empaquetar_grupo(cajas, DOCK_THRESHOLD)
+            for barra, caja, (x, y) in zip(grupo, cajas, posiciones):
+                if (x, y) != (caja.x, caja.y):
+                    movimientos.append((barra, x, y))
+            # Orden de la disposición: desempata la siguiente pasada
+            orden = sorted(range(len(grupo)), key=lambda i: (posiciones[i][1], posiciones[i][0]))
+            grupo[:] = [grupo[i] for i in orden]
+
+        for barra, x, y in movimientos:
+            barra.move(x, y)
+
     def verificar_snap_y_acoplamiento(self, barra):
         """Verifica si la barra debe hacer snap a taskbar o acoplarse a otra"""
         pos = barra.pos()
@@ -753,7 +1569,8 @@ class GestorBarras(QWidget):
             grupo1.extend(grupo2)
             self.grupos_acoplados.remove(grupo2)
 
-        self.guardar_config()
+        self.programar_disposicion(barra1)
+        self.guardar_config(("grupos",))
 
     def desacoplar_barra(self, barra):
         """Desacopla una barra de su grupo"""
@@ -762,27 +1579,36 @@ class GestorBarras(QWidget):
                 grupo.remove(barra)
                 if len(grupo) < 2:
                     self.grupos_acoplados.remove(grupo)
-                self.guardar_config()
+                self.guardar_config(("grupos",))
                 return
 
     def crear_nueva_barra(self):
         nombre, ok = QInputDialog.getText(self, "Nueva Barra", "Nombre de la barra:")
         if ok and nombre:
+            if nombre in self.id_por_nombre:
+                QMessageBox.warning(self, "Nueva Barra", f"Ya existe una barra '{nombre}'")
+                return
             indice = len(self.config["barras"])
-            color_borde = generar_color_unico(indice)
+            color_borde = self.paleta_barras.nuevo_color()
 
             nueva_barra = {
+                "id": self.nuevo_id(),
                 "nombre": nombre,
                 "archivos": [],
                 "posicion": {"x": 100, "y": 100},
                 "color_borde": color_borde
             }
             self.config["barras"].append(nueva_barra)
-            self.guardar_config()
+            self.config_por_id[nueva_barra["id"]] = nueva_barra
+            self.id_por_nombre[nombre] = nueva_barra["id"]
+            self.indexar_barra(nueva_barra)
+            self.guardar_config(("barra", nueva_barra))
 
-            barra = BarraArchivos(nombre, [], color_borde, indice)
+            barra = BarraArchivos(nombre, nueva_barra["archivos"], color_borde, indice,
+                                  barra_id=nueva_barra["id"])
             barra.move(100, 100)
             self.barras.append(barra)
+            self.barras_por_id[barra.barra_id] = barra
             self.actualizar_listado_barras()
 
     def agregar_archivo(self):
@@ -800,26 +1626,23 @@ class GestorBarras(QWidget):
         if not archivo:
             return
 
-        for i, barra_config in enumerate(self.config["barras"]):
-            if barra_config["nombre"] == barra_nombre:
-                orden = len(barra_config["archivos"]) + 1
-
-                barra_config["archivos"].append({
-                    "path": archivo,
-                    "orden": orden,
-                    "color": ""  # Se recalcula abajo
-                })
-
-                # Recalcular colores de TODOS los archivos para máximo contraste
-                total = len(barra_config["archivos"])
-                hue_base = (i * 60) % 360
-                for j, arch in enumerate(barra_config["archivos"]):
-                    arch["color"] = generar_color_archivo(j, total, hue_base)
-
-                self.guardar_config()
-                self.barras[i].archivos_config = barra_config["archivos"]
-                self.actualizar_listado_barras()
-                break
+        barra_config, barra = self.buscar_barra(barra_nombre)
+        orden = len(barra_config["archivos"]) + 1
+
+        nuevo = {
+            "id": self.nuevo_id(),
+            "path": archivo,
+            "orden": orden,
+            "color": self.paleta_archivos.nuevo_color()  # Los demás conservan el suyo
+        }
+        barra_config["archivos"].append(nuevo)
+        self.indexar_archivo(barra.barra_id, nuevo)
+
+        self.guardar_config(("archivo", barra.barra_id, nuevo))
+        barra.archivos_config = barra_config["archivos"]
+        self.quitar_recuadro_barra(barra.barra_id)
+        self.actualizar_listado_barras()
+        self.verificador.comprobar([archivo])
 
     def renombrar_barra(self):
         """Permite cambiar el nombre de una barra existente"""
@@ -838,16 +1661,20 @@ class GestorBarras(QWidget):
         )
         if not ok or not nuevo_nombre or nuevo_nombre == barra_actual:
             return
+        if nuevo_nombre in self.id_por_nombre:
+            QMessageBox.warning(self, "Renombrar Barra", f"Ya existe una barra '{nuevo_nombre}'")
+            return
 
-        # Actualizar en config y en la barra
-        for i, barra_config in enumerate(self.config["barras"]):
-            if barra_config["nombre"] == barra_actual:
-                barra_config["nombre"] = nuevo_nombre
-                self.barras[i].nombre_barra = nuevo_nombre
-                self.barras[i].setWindowTitle(nuevo_nombre)
-                self.guardar_config()
-                self.actualizar_listado_barras()
-                break
+        # Actualizar en config, índice y en la barra (los grupos van por ID)
+        barra_config, barra = self.buscar_barra(barra_actual)
+        barra_config["nombre"] = nuevo_nombre
+        self.indice_busqueda.agregar(("barra", barra.barra_id), nuevo_nombre)
+        del self.id_por_nombre[barra_actual]
+        self.id_por_nombre[nuevo_nombre] = barra.barra_id
+        barra.nombre_barra = nuevo_nombre
+        barra.setWindowTitle(nuevo_nombre)
+        self.guardar_config(("barra", barra_config))
+        self.actualizar_listado_barras()
 
     def eliminar_barra(self):
         """Elimina una barra completamente"""
@@ -870,23 +1697,34 @@ class GestorBarras(QWidget):
         if respuesta != QMessageBox.Yes:
             return
 
-        # Buscar índice y eliminar
-        for i, barra_config in enumerate(self.config["barras"]):
-            if barra_config["nombre"] == barra_nombre:
-                # Cerrar y eliminar la barra visual
-                self.barras[i].timer.stop()
-                self.barras[i].close()
-
-                # Quitar de grupos acoplados si está
-                self.desacoplar_barra(self.barras[i])
-
-                # Eliminar de listas
-                del self.barras[i]
-                del self.config["barras"][i]
+        barra_config, barra = self.buscar_barra(barra_nombre)
 
-                self.guardar_config()
-                self.actualizar_listado_barras()
-                break
+        # Cerrar y eliminar la barra visual
+        barra.close()
+        # Fuera de recientes solo lo que ninguna otra barra tiene abierto
+        abiertos_en_otras = set()
+        for otra in self.barras:
+            if otra is not barra:
+                abiertos_en_otras.update(otra.ventanas_info)
+        self.recientes.aplicar({p: v for p, v in barra.ventanas_info.items()
+                                if p not in abiertos_en_otras}, {})
+
+        # Quitar de grupos acoplados si está
+        self.desacoplar_barra(barra)
+
+        # Eliminar de listas e índices
+        self.barras.remove(barra)
+        del self.config["barras"][next(
+            i for i, b in enumerate(self.config["barras"]) if b is barra_config)]
+        del self.config_por_id[barra.barra_id]
+        del self.barras_por_id[barra.barra_id]
+        del self.id_por_nombre[barra_nombre]
+        self.desindexar_barra(barra_config)
+        self.paleta_barras.liberar([barra_config.get("color_borde")])
+        self.paleta_archivos.liberar(a.get("color") for a in barra_config["archivos"])
+
+        self.guardar_config(("eliminar_barra", barra.barra_id))
+        self.actualizar_listado_barras()
 
     def cerrar_barras(self):
         """Cierra todas las barras y la aplicación (archivos siguen abiertos)"""
@@ -904,7 +1742,7 @@ class GestorBarras(QWidget):
         # Cerrar los archivos (enviar WM_CLOSE a cada ventana)
         for hwnd in ventanas_a_cerrar:
             try:
-                win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+                backend_ventanas.cerrar(hwnd)
             except:
                 pass
 
@@ -913,37 +1751,83 @@ class GestorBarras(QWidget):
     def closeEvent(self, event):
         """Al cerrar el gestor, cerrar todo"""
         self.guardar_posiciones()
+        self.guardar_snapshot()
+        self.nucleo.cerrar()
+        self.detener_grabacion()
+        cambios = self.cambios_en_vuelo + self.cambios_pendientes
+        if cambios:
+            # El bucle se detiene: lo pendiente se escribe ya. El lock espera a
+            # la escritura que esté en curso en el ejecutor, y el lote en vuelo
+            # se vuelve a escribir por si la cancelación llegó antes de terminar
+            self.escribir_config(self.config, cambios)
+            self.cambios_en_vuelo = []
+            self.cambios_pendientes = []
+        self.atajo_selector.liberar()
+        self.selector.close()
         for barra in self.barras:
-            barra.timer.stop()
             barra.close()
         event.accept()
 
     def guardar_posiciones(self):
-        """Guarda las posiciones actuales de las barras"""
-        for i, barra in enumerate(self.barras):
-            if i < len(self.config["barras"]):
-                pos = barra.pos()
-                self.config["barras"][i]["posicion"] = {"x": pos.x(), "y": pos.y()}
-        self.guardar_config()
+        """Guarda las posiciones actuales de las barras (solo las que se movieron)"""
+        cambios = []
+        for barra in self.barras:
+            barra_config = self.config_por_id[barra.barra_id]
+            posicion = {"x": barra.pos().x(), "y": barra.pos().y()}
+            if barra_config.get("posicion") != posicion:
+                barra_config["posicion"] = posicion
+                cambios.append(("barra", barra_config))
+        self.guardar_config(*cambios)
+
+
+def comando_de_argumentos(argumentos):
+    """--minimizar BARRA / --restaurar BARRA / --selector / --estadisticas /
+    --grabar TRAZA [--anonimizar] / --detener-grabacion -> comando IPC; sin argumentos: mostrar"""
+    if len(argumentos) == 2 and argumentos[0] in ("--minimizar", "--restaurar"):
+        return f"{argumentos[0][2:]} {argumentos[1]}"
+    if argumentos in (["--selector"], ["--estadisticas"]):
+        return argumentos[0][2:]
+    if len(argumentos) in (2, 3) and argumentos[0] == "--grabar":
+        if argumentos[2:] == ["--anonimizar"]:
+            return f"grabar_anonimo {os.path.abspath(argumentos[1])}"
+        if len(argumentos) == 2:
+            return f"grabar {os.path.abspath(argumentos[1])}"
+    if argumentos == ["--detener-grabacion"]:
+        return "detener_grabacion"
+    return "mostrar"
 
 
 def main():
     app = QApplication(sys.argv)
+    comando = comando_de_argumentos(sys.argv[1:])
 
     # Verificar si ya hay una instancia corriendo
     socket = QLocalSocket()
-    socket.connectToServer("BarrasTareasApp")
+    socket.connectToServer(NOMBRE_SERVIDOR)
     if socket.waitForConnected(500):
-        # Ya hay otra instancia, enviar señal y salir
+        # Ya hay otra instancia: enviarle el comando y salir
+        socket.write((comando + "\n").encode('utf-8'))
+        socket.waitForBytesWritten(500)
+        if socket.waitForReadyRead(2000):
+            respuesta = bytes(socket.readLine()).decode('utf-8').strip()
+            if respuesta.startswith("ok "):
+                print(respuesta[3:])
+            elif respuesta != "ok":
+                print(respuesta)
         socket.disconnectFromServer()
         return
+    if comando != "mostrar":
+        print("No hay ninguna instancia de Barras en ejecución")
+        return
 
     app.setQuitOnLastWindowClosed(False)
+    bucle = crear_bucle(app)
 
     gestor = GestorBarras()
     gestor.show()
 
-    sys.exit(app.exec_())
+    with bucle:
+        sys.exit(bucle.run_forever())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+"""
+Prueba del seguimiento de carpetas del Explorador (RastreadorCarpetas).
+
+Contra el backend simulado comprueba que dos carpetas con el mismo nombre
+en rutas distintas se emparejan cada una con su ventana, que navegar a otra
+carpeta vuelve a consultar al shell y que una ventana sin cambios no.
+Falla (código 1) si alguna comprobación no se cumple.
+
+Uso:
+    python prueba_carpetas.py
+"""
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sys
+
+import prototipo
+from simulacion import BackendSimulado
+
+INFORMES_2024 = "C:\\Proyectos\\2024\\Informes"
+INFORMES_2025 = "C:\\Proyectos\\2025\\Informes"
+ACTAS = "C:\\Proyectos\\2025\\Actas"
+
+
+def escanear(archivos):
+    """Un escaneo: enumera (con el rastreador) y empareja los paths dados"""
+    return prototipo.emparejar_ventanas(prototipo.enumerar_ventanas(),
+                                        [{"path": path} for path in archivos])
+
+
+def prueba_mismo_nombre(backend):
+    """Dos "Informes" en rutas distintas: cada path con su ventana"""
+    hwnd_2024 = backend.abrir_carpeta(INFORMES_2024)
+    hwnd_2025 = backend.abrir_carpeta(INFORMES_2025)
+    info = escanear([INFORMES_2024, INFORMES_2025])
+    return (info.get(INFORMES_2024) is not None and info[INFORMES_2024].hwnd == hwnd_2024
+            and info.get(INFORMES_2025) is not None and info[INFORMES_2025].hwnd == hwnd_2025)
+
+
+def prueba_navegar(backend):
+    """Navegar a otra carpeta cambia el título: se vuelve a consultar"""
+    hwnd = backend.abrir_carpeta(INFORMES_2025)
+    escanear([INFORMES_2025, ACTAS])
+    consultas = backend.consultas_carpetas
+    backend.navegar(hwnd, ACTAS)
+    info = escanear([INFORMES_2025, ACTAS])
+    return (backend.consultas_carpetas == consultas + 1
+            and INFORMES_2025 not in info
+            and info.get(ACTAS) is not None and info[ACTAS].hwnd == hwnd)
+
+
+def prueba_sin_cambios(backend):
+    """Una ventana que no cambia no se vuelve a consultar"""
+    backend.abrir_carpeta(INFORMES_2024)
+    escanear([INFORMES_2024])
+    consultas = backend.consultas_carpetas
+    info = escanear([INFORMES_2024])
+    return backend.consultas_carpetas == consultas and INFORMES_2024 in info
+
+
+PRUEBAS = [prueba_mismo_nombre, prueba_navegar, prueba_sin_cambios]
+
+
+def main():
+    fallos = 0
+    for prueba in PRUEBAS:
+        # Escritorio y caché del rastreador nuevos para cada prueba
+        backend = BackendSimulado()
+        prototipo.usar_backend(backend)
+        correcta = prueba(backend)
+        fallos += not correcta
+        print(f"{prueba.__name__:22s} {'ok' if correcta else 'FALLO'}")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Prueba de resistencia (soak test) del gestor de barras.
+
+Ejecuta GestorBarras con Qt offscreen contra un escritorio simulado con
+churn de ventanas (abrir, cerrar, renombrar) a ritmo acelerado, y muestrea
+objetos Python, widgets Qt vivos y RSS. Falla (código 1) si alguna métrica
+crece sin límite tras el calentamiento.
+
+Uso:
+    python prueba_resistencia.py --duracion 600 --tick 50 --barras 5 --archivos 8
+"""
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import tempfile
+import time
+
+import psutil
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer, qInstallMessageHandler
+
+import prototipo
+from nucleo import crear_bucle
+from simulacion import BackendSimulado, ChurnEscritorio
+
+# Crecimiento relativo permitido entre el primer y el último tercio
+TOLERANCIAS = {
+    "objetos": 0.05,
+    "rss": 0.15,
+}
+FRACCION_CALENTAMIENTO = 0.2
+
+
+def silenciar_qt(tipo, contexto, mensaje):
+    """Descarta los avisos de Qt (stylesheet, plugin offscreen) que se repiten en cada tick"""
+
+
+def crear_config(directorio, num_barras, num_archivos):
+    """Escribe un config.json de prueba y retorna los paths configurados"""
+    barras = []
+    paths = []
+    for i in range(num_barras):
+        archivos = []
+        for j in range(num_archivos):
+            path = os.path.join(directorio, f"barra{i}", f"archivo_{i}_{j}.xlsx")
+            archivos.append({"path": path, "orden": j + 1})
+            paths.append(path)
+        barras.append({"nombre": f"Barra {i}", "archivos": archivos,
+                       "posicion": {"x": 100, "y": 100 + 60 * i}})
+    with open(prototipo.CONFIG_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"barras": barras}, f)
+    return paths
+
+
+def tomar_muestra(proceso):
+    gc.collect()
+    return {
+        "t": time.monotonic(),
+        "objetos": len(gc.get_objects()),
+        "widgets": len(QApplication.allWidgets()),
+        "rss": proceso.memory_info().rss,
+    }
+
+
+def analizar(muestras, limite_widgets):
+    """Retorna {metrica: (inicio, final, crecimiento)} y la lista de métricas que fallan.
+
+    Los widgets tienen un techo conocido (un botón por archivo configurado,
+    más los pendientes de deleteLater de un tick); el resto se juzga por
+    crecimiento entre el primer y el último tercio.
+    """
+    inicio = int(len(muestras) * FRACCION_CALENTAMIENTO)
+    utiles = muestras[inicio:]
+    tercio = max(1, len(utiles) // 3)
+    resultado = {}
+    fallos = []
+    for metrica, tolerancia in TOLERANCIAS.items():
+        primero = statistics.median(m[metrica] for m in utiles[:tercio])
+        ultimo = statistics.median(m[metrica] for m in utiles[-tercio:])
+        crecimiento = (ultimo - primero) / primero if primero else 0.0
+        resultado[metrica] = (primero, ultimo, crecimiento)
+        # Crece sin límite si el último tercio supera la tolerancia Y
+        # el máximo sigue subiendo al final (no es un pico pasajero)
+        maximo_medio = max(m[metrica] for m in utiles[:-tercio] or utiles)
+        if crecimiento > tolerancia and max(m[metrica] for m in utiles[-tercio:]) > maximo_medio:
+            fallos.append(metrica)
+
+    widgets = [m["widgets"] for m in utiles]
+    resultado["widgets"] = (widgets[0], widgets[-1], (widgets[-1] - widgets[0]) / widgets[0])
+    if max(widgets) > limite_widgets:
+        fallos.append("widgets")
+    return resultado, fallos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duracion", type=float, default=300, help="segundos de prueba")
+    parser.add_argument("--tick", type=int, default=50, help="ms entre escaneos y pasos de churn")
+    parser.add_argument("--muestreo", type=float, default=2.0, help="segundos entre muestras")
+    parser.add_argument("--barras", type=int, default=5)
+    parser.add_argument("--archivos", type=int, default=8, help="archivos por barra")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--csv", help="guardar muestras en este CSV")
+    parser.add_argument("--verbose", action="store_true", help="mostrar los mensajes de Qt")
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix="barras_soak_")
+    prototipo.CONFIG_FILE = os.path.join(directorio, "config.json")
+    prototipo.CONFIG_DB = os.path.join(directorio, "config.db")
+    prototipo.ESTADO_FILE = os.path.join(directorio, "estado.json")
+    prototipo.ICONOS_DIR = os.path.join(directorio, "iconos_cache")
+    prototipo.INTERVALO_MONITOR = args.tick
+    prototipo.INTERVALO_SNAPSHOT = args.tick * 10
+
+    backend = BackendSimulado()
+    prototipo.usar_backend(backend)
+    paths = crear_config(directorio, args.barras, args.archivos)
+
+    if not args.verbose:
+        qInstallMessageHandler(silenciar_qt)
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    bucle = crear_bucle(app)
+    gestor = prototipo.GestorBarras()
+    limite_widgets = len(QApplication.allWidgets()) + 2 * len(paths)
+
+    churn = ChurnEscritorio(backend, paths, semilla=args.semilla)
+    timer_churn = QTimer()
+    timer_churn.timeout.connect(churn.paso)
+    timer_churn.start(args.tick)
+
+    proceso = psutil.Process()
+    muestras = []
+
+    def muestrear():
+        muestra = tomar_muestra(proceso)
+        muestras.append(muestra)
+        print(f"[{muestra['t'] - muestras[0]['t']:7.1f}s] objetos={muestra['objetos']} "
+              f"widgets={muestra['widgets']} rss={muestra['rss'] / 1e6:.1f}MB", flush=True)
+
+    timer_muestreo = QTimer()
+    timer_muestreo.timeout.connect(muestrear)
+    timer_muestreo.start(int(args.muestreo * 1000))
+    QTimer.singleShot(int(args.duracion * 1000), app.quit)
+
+    with bucle:
+        bucle.run_forever()
+        timer_churn.stop()
+        timer_muestreo.stop()
+        gestor.close()
+        estadisticas = gestor.nucleo.estadisticas()
+
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8') as f:
+            f.write("t,objetos,widgets,rss\n")
+            for m in muestras:
+                f.write(f"{m['t']:.3f},{m['objetos']},{m['widgets']},{m['rss']}\n")
+
+    if len(muestras) < 6:
+        print("Muy pocas muestras: aumenta --duracion o reduce --muestreo")
+        return 2
+
+    resultado, fallos = analizar(muestras, limite_widgets)
+    for metrica, (primero, ultimo, crecimiento) in resultado.items():
+        estado = "FALLO" if metrica in fallos else "ok"
+        print(f"{metrica:8s} {primero:>14.0f} -> {ultimo:>14.0f} ({crecimiento:+.1%}) {estado}")
+    print(f"techo de widgets: {limite_widgets}")
+    for nombre, tarea in estadisticas["tareas"].items():
+        print(f"tarea {nombre:14s} {tarea['ejecuciones']:6d} ejecuciones, "
+              f"latencia media {tarea['latencia_media_ms']:.1f} ms, máx {tarea['latencia_max_ms']:.1f} ms, "
+              f"retraso máx {tarea['retraso_max_ms']:.1f} ms, errores {tarea['errores']}, "
+              f"timeouts {tarea['timeouts']}")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
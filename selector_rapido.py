@@ -0,0 +1,200 @@
+"""
+Selector rápido de archivos abiertos con un atajo global (Ctrl+Alt+Espacio).
+
+IndiceRecientes guarda los archivos abiertos en orden de uso (el más reciente
+al final de un OrderedDict) y lo mantienen los escaneos de las barras: entra
+al abrirse la ventana, sube al pasar a ser la ventana activa y sale al
+cerrarse. Mostrar el selector no escanea nada y cada tecla filtra sobre los
+nombres ya normalizados. Al elegir se usa el hwnd guardado en el índice.
+"""
+
+import os
+from collections import OrderedDict, namedtuple
+
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, QEvent, QAbstractNativeEventFilter, pyqtSignal
+
+from indice_busqueda import normalizar
+
+try:
+    import ctypes
+    from ctypes import wintypes
+    user32 = ctypes.WinDLL("user32", use_last_error=True)
+    user32.RegisterHotKey.argtypes = [wintypes.HWND, ctypes.c_int, wintypes.UINT, wintypes.UINT]
+    user32.UnregisterHotKey.argtypes = [wintypes.HWND, ctypes.c_int]
+except (ImportError, AttributeError, OSError, ValueError):  # Fuera de Windows
+    user32 = None
+
+WM_HOTKEY = 0x0312
+MOD_ALT = 0x0001
+MOD_CONTROL = 0x0002
+MOD_NOREPEAT = 0x4000
+VK_SPACE = 0x20
+ATAJO_SELECTOR = (MOD_CONTROL | MOD_ALT, VK_SPACE)  # Ctrl+Alt+Espacio
+
+# hwnd: ventana del último escaneo; clave: nombre normalizado para filtrar
+Reciente = namedtuple("Reciente", "hwnd nombre clave")
+
+
+class IndiceRecientes:
+    """Archivos abiertos en orden de uso, mantenido por los escaneos"""
+
+    def __init__(self):
+        self.entradas = OrderedDict()  # {path: Reciente}, el más reciente al final
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def aplicar(self, anteriores, actuales, activa=None):
+        """Aplica el resultado de un escaneo de una barra.
+
+        anteriores/actuales: {path: Ventana} antes y después del escaneo.
+        activa: hwnd de la ventana en primer plano (sube al principio).
+        """
+        for path in anteriores.keys() - actuales.keys():
+            self.entradas.pop(path, None)
+        for path, ventana in actuales.items():
+            reciente = self.entradas.get(path)
+            if reciente is None or reciente.hwnd != ventana.hwnd:
+                nombre = os.path.basename(path)
+                # Una ventana recién abierta es también la recién usada
+                self.entradas[path] = Reciente(ventana.hwnd, nombre, normalizar(nombre))
+            if ventana.hwnd == activa:
+                self.entradas.move_to_end(path)
+
+    def usar(self, path):
+        if path in self.entradas:
+            self.entradas.move_to_end(path)
+
+    def buscar(self, texto=""):
+        """[(path, Reciente)] del más al menos reciente que contienen todas las palabras"""
+        palabras = normalizar(texto).split()
+        return [(path, reciente) for path, reciente in reversed(self.entradas.items())
+                if all(p in reciente.clave for p in palabras)]
+
+
+class SelectorRapido(QWidget):
+    """Ventana emergente: escribir filtra, flechas mueven, Enter cambia, Esc cierra"""
+
+    elegido = pyqtSignal(str, int)  # path, hwnd
+
+    def __init__(self, recientes):
+        super().__init__(None, Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.recientes = recientes
+        self.setMinimumWidth(420)
+        self.setStyleSheet("""
+            QWidget {
+                background-color: #1e1e1e;
+                color: white;
+                font-size: 13px;
+            }
+            QLineEdit {
+                background-color: #2d2d3a;
+                border: 1px solid #0078d4;
+                border-radius: 4px;
+                padding: 6px;
+            }
+            QListWidget {
+                border: none;
+            }
+            QListWidget::item:selected {
+                background-color: #0078d4;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        self.entrada = QLineEdit()
+        self.entrada.setPlaceholderText("Cambiar a archivo abierto...")
+        self.entrada.textChanged.connect(self.filtrar)
+        self.entrada.installEventFilter(self)
+        self.lista = QListWidget()
+        self.lista.itemActivated.connect(lambda _: self.activar())
+        layout.addWidget(self.entrada)
+        layout.addWidget(self.lista)
+
+    def mostrar(self, activa=None):
+        """Muestra los archivos abiertos; si el primero ya es la ventana activa
+        se preselecciona el segundo (como Alt+Tab)"""
+        self.entrada.blockSignals(True)
+        self.entrada.clear()
+        self.entrada.blockSignals(False)
+        self.filtrar("")
+        if self.lista.count() > 1 and self.lista.item(0).data(Qt.UserRole + 1) == activa:
+            self.lista.setCurrentRow(1)
+
+        pantalla = QApplication.primaryScreen().availableGeometry()
+        self.adjustSize()
+        self.move(pantalla.center().x() - self.width() // 2, pantalla.top() + pantalla.height() // 4)
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.entrada.setFocus()
+
+    def filtrar(self, texto):
+        self.lista.clear()
+        for path, reciente in self.recientes.buscar(texto):
+            item = QListWidgetItem(reciente.nombre)
+            item.setToolTip(path)
+            item.setData(Qt.UserRole, path)
+            item.setData(Qt.UserRole + 1, reciente.hwnd)
+            self.lista.addItem(item)
+        self.lista.setCurrentRow(0)
+
+    def activar(self):
+        item = self.lista.currentItem()
+        self.hide()
+        if item is not None:
+            self.elegido.emit(item.data(Qt.UserRole), item.data(Qt.UserRole + 1))
+
+    def eventFilter(self, objeto, event):
+        """Teclas de navegación sobre la caja de texto"""
+        if objeto is self.entrada and event.type() == QEvent.KeyPress:
+            tecla = event.key()
+            if tecla in (Qt.Key_Down, Qt.Key_Up) and self.lista.count():
+                paso = 1 if tecla == Qt.Key_Down else -1
+                self.lista.setCurrentRow((self.lista.currentRow() + paso) % self.lista.count())
+                return True
+            if tecla in (Qt.Key_Return, Qt.Key_Enter):
+                self.activar()
+                return True
+            if tecla == Qt.Key_Escape:
+                self.hide()
+                return True
+        return super().eventFilter(objeto, event)
+
+    def changeEvent(self, event):
+        """Se cierra al perder el foco"""
+        if event.type() == QEvent.ActivationChange and self.isVisible() and not self.isActiveWindow():
+            self.hide()
+        super().changeEvent(event)
+
+
+class AtajoGlobal(QAbstractNativeEventFilter):
+    """Atajo de teclado global (RegisterHotKey); llama a `accion` al pulsarlo.
+
+    Se registra sin ventana, así que WM_HOTKEY llega a la cola del hilo de la
+    GUI; el filtro nativo lo intercepta antes que Qt.
+    """
+
+    def __init__(self, accion, modificadores, tecla, id_atajo=1):
+        super().__init__()
+        self.accion = accion
+        self.id_atajo = id_atajo
+        self.registrado = bool(user32 and user32.RegisterHotKey(
+            None, id_atajo, modificadores | MOD_NOREPEAT, tecla))
+        if self.registrado:
+            QApplication.instance().installNativeEventFilter(self)
+
+    def nativeEventFilter(self, tipo, mensaje):
+        if tipo in (b"windows_generic_MSG", b"windows_dispatcher_MSG"):
+            msg = wintypes.MSG.from_address(int(mensaje))
+            if msg.message == WM_HOTKEY and msg.wParam == self.id_atajo:
+                self.accion()
+                return True, 0
+        return False, 0
+
+    def liberar(self):
+        if self.registrado:
+            user32.UnregisterHotKey(None, self.id_atajo)
+            QApplication.instance().removeNativeEventFilter(self)
+            self.registrado = False
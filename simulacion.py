@@ -0,0 +1,178 @@
+"""
+Escritorio simulado para probar las barras sin Windows.
+
+BackendSimulado implementa la misma interfaz que prototipo.BackendWin32
+sobre un diccionario de ventanas en memoria. ChurnEscritorio abre, cierra
+y renombra ventanas de forma guionizada (semilla fija => reproducible).
+"""
+
+import os
+import ntpath
+import random
+import threading
+
+from prototipo import Ventana, CLASES_EXPLORADOR
+
+# Formatos de título habituales (Office, editores, Bloc de notas)
+FORMATOS_TITULO = [
+    "{nombre} - Excel",
+    "{nombre} - Word",
+    "*{nombre} - Notepad++",
+    "{sin_ext} - Bloc de notas",
+    "{nombre} - Guardado",
+]
+
+
+class BackendSimulado:
+    """Ventanas en memoria con la interfaz de BackendWin32"""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # El escaneo enumera en los hilos del ejecutor del núcleo
+        self._ventanas = {}  # {hwnd: Ventana}
+        self._minimizadas = set()
+        self.orden_z = []  # Último orden aplicado por restaurar_lote (la primera encima)
+        self.activa = None  # hwnd en primer plano
+        self._carpetas = {}  # {hwnd: ubicación} de las ventanas del Explorador
+        self.consultas_carpetas = 0  # Llamadas a consultar_carpetas
+        self._siguiente_hwnd = 0x10000
+        self.pid = os.getpid()  # pid vivo para que el snapshot no se descarte
+
+    # --- Interfaz de backend ---
+
+    def enumerar(self):
+        with self._lock:
+            return [v._replace(minimizada=hwnd in self._minimizadas)
+                    for hwnd, v in self._ventanas.items()]
+
+    def consultar_carpetas(self, hwnds):
+        with self._lock:
+            self.consultas_carpetas += 1
+            return {hwnd: self._carpetas[hwnd] for hwnd in hwnds if hwnd in self._carpetas}
+
+    def sigue_viva(self, ventana):
+        with self._lock:
+            actual = self._ventanas.get(ventana.hwnd)
+        return actual is not None and actual.pid == ventana.pid
+
+    def ventana_activa(self):
+        return self.activa
+
+    def restaurar(self, hwnd):
+        self._minimizadas.discard(hwnd)
+        self.activa = hwnd
+
+    def activar(self, hwnd):
+        self.activa = hwnd
+
+    def minimizar(self, hwnd):
+        if hwnd in self._ventanas:
+            self._minimizadas.add(hwnd)
+
+    def cerrar(self, hwnd):
+        self.cerrar_ventana(hwnd)
+
+    def minimizar_lote(self, hwnds):
+        for hwnd in hwnds:
+            self.minimizar(hwnd)
+
+    def restaurar_lote(self, hwnds, minimizadas=()):
+        for hwnd in minimizadas:
+            self._minimizadas.discard(hwnd)
+        self.orden_z = list(hwnds)
+        if hwnds:
+            self.activa = hwnds[0]
+
+    # --- Control del escritorio simulado ---
+
+    def abrir_ventana(self, titulo, pid=None):
+        """Crea una ventana y retorna su hwnd"""
+        with self._lock:
+            self._siguiente_hwnd += 4
+            hwnd = self._siguiente_hwnd
+            self._ventanas[hwnd] = Ventana(hwnd, titulo, pid or self.pid)
+            self.activa = hwnd  # Una ventana nueva toma el foco
+        return hwnd
+
+    def poner_ventana(self, ventana):
+        """Crea o sustituye una ventana con su hwnd exacto (reproducción de trazas)"""
+        with self._lock:
+            self._ventanas[ventana.hwnd] = ventana._replace(minimizada=False)
+            if ventana.carpeta:
+                self._carpetas[ventana.hwnd] = ventana.carpeta
+            else:
+                self._carpetas.pop(ventana.hwnd, None)
+        if ventana.minimizada:
+            self._minimizadas.add(ventana.hwnd)
+        else:
+            self._minimizadas.discard(ventana.hwnd)
+
+    def abrir_carpeta(self, path):
+        """Ventana del Explorador en path (título = nombre de la carpeta)"""
+        hwnd = self.abrir_ventana(ntpath.basename(path.rstrip("/\\")) or path)
+        with self._lock:
+            self._ventanas[hwnd] = self._ventanas[hwnd]._replace(clase=CLASES_EXPLORADOR[0])
+            self._carpetas[hwnd] = path
+        return hwnd
+
+    def navegar(self, hwnd, path):
+        """El Explorador cambia de carpeta (y de título)"""
+        with self._lock:
+            self._carpetas[hwnd] = path
+        self.renombrar_ventana(hwnd, ntpath.basename(path.rstrip("/\\")) or path)
+
+    def cerrar_ventana(self, hwnd):
+        with self._lock:
+            self._ventanas.pop(hwnd, None)
+            self._carpetas.pop(hwnd, None)
+        self._minimizadas.discard(hwnd)
+        if self.activa == hwnd:
+            self.activa = None
+
+    def renombrar_ventana(self, hwnd, titulo):
+        with self._lock:
+            if hwnd in self._ventanas:
+                self._ventanas[hwnd] = self._ventanas[hwnd]._replace(titulo=titulo)
+
+    def hwnds(self):
+        with self._lock:
+            return list(self._ventanas)
+
+
+class ChurnEscritorio:
+    """Abre, cierra y renombra ventanas de archivos de forma guionizada"""
+
+    def __init__(self, backend, paths, semilla=0, max_ventanas=None):
+        self.backend = backend
+        self.paths = list(paths)
+        self.random = random.Random(semilla)
+        self.max_ventanas = max_ventanas or len(self.paths)
+        self.abiertas = {}  # {hwnd: path}, None si el título ya no corresponde
+
+    def titulo_para(self, path):
+        nombre = ntpath.basename(path)
+        formato = self.random.choice(FORMATOS_TITULO)
+        return formato.format(nombre=nombre, sin_ext=ntpath.splitext(nombre)[0])
+
+    def paso(self):
+        """Aplica una operación aleatoria: abrir, cerrar o renombrar"""
+        operacion = self.random.random()
+        if operacion < 0.4 and len(self.abiertas) < self.max_ventanas:
+            path = self.random.choice(self.paths)
+            hwnd = self.backend.abrir_ventana(self.titulo_para(path))
+            self.abiertas[hwnd] = path
+        elif operacion < 0.75 and self.abiertas:
+            hwnd = self.random.choice(list(self.abiertas))
+            self.backend.cerrar_ventana(hwnd)
+            del self.abiertas[hwnd]
+        elif self.abiertas:
+            hwnd = self.random.choice(list(self.abiertas))
+            if self.random.random() < 0.3:
+                # Archivo renombrado en la aplicación: deja de coincidir
+                self.abiertas[hwnd] = None
+                titulo = f"renombrado_{self.random.randrange(10**6)}.tmp - Excel"
+            else:
+                # Cambio de título habitual (*, "Guardado"...)
+                path = self.abiertas[hwnd] or self.random.choice(self.paths)
+                self.abiertas[hwnd] = path
+                titulo = self.titulo_para(path)
+            self.backend.renombrar_ventana(hwnd, titulo)
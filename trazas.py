@@ -0,0 +1,264 @@
+"""
+Grabación y reproducción de trazas de ventanas reales para medir el pipeline.
+
+Grabar (en la instancia en ejecución, por IPC):
+    python prototipo.py --grabar traza.jsonl.gz [--anonimizar]
+    python prototipo.py --detener-grabacion
+
+Cada línea de la traza es JSON; con extensión .gz va comprimida:
+    {"tipo": "cabecera", "version": 1, "anonimizada": false, "barras": [...]}
+    {"t": 2003, "+": [[hwnd, titulo, pid, minimizada, clase, carpeta], ...], "-": [hwnd, ...]}
+
+Solo se guardan diferencias con el escaneo anterior: ventanas nuevas o que
+cambiaron ("+", fila completa sin los campos finales vacíos) y cerradas ("-").
+t son ms desde el inicio. Un escaneo sin cambios es solo {"t": ...}.
+
+Al anonimizar, cada palabra de títulos, carpetas y de los nombres y paths de
+la cabecera se sustituye, letra a letra, por otra de la misma longitud
+(minúsculas y dígitos, sal aleatoria que no se guarda). Cada letra sale de
+un hash de la letra y de todo lo anterior de la palabra, sin repetir entre
+letras que siguen al mismo prefijo; \w admite más de 36 caracteres (ñ,
+vocales con tilde, _), así que si tras un prefijo ya están todas se sigue
+por otras letras Unicode. Así la misma palabra da siempre la
+misma sustituta, dos distintas nunca la misma y un prefijo sigue siendo
+prefijo ("doc" / "docx", "informe" / "informe2"): el emparejado por
+inicio del título da lo mismo que con la traza original.
+
+Reproducir (Linux, sin win32, Qt offscreen, lo más rápido posible):
+    python trazas.py reproducir traza.jsonl.gz [--repeticiones 3] [--json]
+
+Pasa cada escaneo por enumerar_ventanas (con el backend simulado),
+emparejar_ventanas y actualizar_botones de cada barra, y muestra escaneos
+por segundo y percentiles de latencia por escaneo.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import itertools
+import statistics
+
+VERSION_TRAZA = 1
+PATRON_PALABRA = re.compile(r"\w+", re.UNICODE)
+LETRAS = "abcdefghijklmnopqrstuvwxyz0123456789"
+INTENTOS_HASH = 64
+
+
+def abrir_traza(path, modo):
+    """Abre la traza en texto; comprimida si termina en .gz"""
+    if path.endswith(".gz"):
+        return gzip.open(path, modo + "t", encoding='utf-8')
+    return open(path, modo, encoding='utf-8')
+
+
+class Anonimizador:
+    """Sustituye cada palabra por otra de su misma longitud conservando los prefijos"""
+
+    def __init__(self, sal=None):
+        self.sal = sal if sal is not None else os.urandom(16)
+        self.cache = {}  # {palabra en minúsculas: sustituta}
+        self.siguientes = {}  # {prefijo original: {letra original: letra sustituta}}
+
+    def palabra(self, palabra):
+        clave = palabra.lower()
+        sustituta = self.cache.get(clave)
+        if sustituta is None:
+            sustituta = "".join(self._letra(clave[:i], letra) for i, letra in enumerate(clave))
+            self.cache[clave] = sustituta
+        return sustituta
+
+    def _letra(self, prefijo, letra):
+        """Sustituta de `letra` tras `prefijo`: distinta de la de cualquier otra
+        letra tras ese mismo prefijo (dos palabras distintas no coinciden)"""
+        siguientes = self.siguientes.setdefault(prefijo, {})
+        sustituta = siguientes.get(letra)
+        if sustituta is None:
+            usadas = set(siguientes.values())
+            for intento in range(INTENTOS_HASH):
+                entrada = self.sal + intento.to_bytes(2, 'big') + (prefijo + letra).encode('utf-8')
+                sustituta = LETRAS[hashlib.shake_128(entrada).digest(1)[0] % len(LETRAS)]
+                if sustituta not in usadas:
+                    break
+            else:
+                # Sin hueco por hash (o LETRAS agotadas): la primera libre, en
+                # LETRAS o más allá, para no repetir nunca
+                sustituta = next(c for c in itertools.chain(LETRAS, map(chr, itertools.count(0xE0)))
+                                 if c not in usadas and c.isalnum())
+            siguientes[letra] = sustituta
+        return sustituta
+
+    def texto(self, texto):
+        """Separadores (espacios, guiones, puntos, barras, *) se conservan"""
+        return PATRON_PALABRA.sub(lambda m: self.palabra(m.group()), texto) if texto else texto
+
+
+class GrabadoraTrazas:
+    """Escribe en una traza las diferencias entre escaneos consecutivos"""
+
+    def __init__(self, path, config, anonimizar=False):
+        self.path = path
+        self.anonimizador = Anonimizador() if anonimizar else None
+        self.archivo = abrir_traza(path, "w")
+        self.inicio = time.monotonic()
+        self.ultimas = {}  # {hwnd: fila del último escaneo}
+        self.escaneos = 0
+        barras = [{"nombre": self._anonimizar(b["nombre"]),
+                   "archivos": [{"path": self._anonimizar(a["path"]), "orden": a.get("orden")}
+                                for a in b.get("archivos", [])]}
+                  for b in config.get("barras", [])]
+        self._escribir({"tipo": "cabecera", "version": VERSION_TRAZA,
+                        "anonimizada": anonimizar, "barras": barras})
+
+    def registrar(self, ventanas):
+        """Añade un escaneo (lista de Ventana) a la traza"""
+        actuales = {}
+        for ventana in ventanas:
+            fila = [ventana.hwnd, self._anonimizar(ventana.titulo), ventana.pid,
+                    ventana.minimizada, ventana.clase, self._anonimizar(ventana.carpeta)]
+            while len(fila) > 3 and not fila[-1]:
+                fila.pop()  # Campos con valor por defecto en Ventana
+            actuales[ventana.hwnd] = fila
+
+        linea = {"t": int((time.monotonic() - self.inicio) * 1000)}
+        nuevas = [fila for hwnd, fila in actuales.items() if self.ultimas.get(hwnd) != fila]
+        cerradas = [hwnd for hwnd in self.ultimas if hwnd not in actuales]
+        if nuevas:
+            linea["+"] = nuevas
+        if cerradas:
+            linea["-"] = cerradas
+        self._escribir(linea)
+        self.ultimas = actuales
+        self.escaneos += 1
+
+    def cerrar(self):
+        self.archivo.close()
+
+    def _anonimizar(self, texto):
+        return self.anonimizador.texto(texto) if self.anonimizador else texto
+
+    def _escribir(self, datos):
+        self.archivo.write(json.dumps(datos, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def leer_traza(path):
+    """Retorna (cabecera, [escaneo]) de una traza"""
+    with abrir_traza(path, "r") as f:
+        cabecera = json.loads(f.readline())
+        if cabecera.get("tipo") != "cabecera" or cabecera.get("version") != VERSION_TRAZA:
+            raise ValueError(f"{path} no es una traza de la versión {VERSION_TRAZA}")
+        return cabecera, [json.loads(linea) for linea in f if linea.strip()]
+
+
+def percentil(ordenados, fraccion):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))]
+
+
+def reproducir(path, repeticiones=1):
+    """Pasa la traza por el pipeline de las barras; retorna un dict con las métricas"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QCoreApplication, QEvent
+    import prototipo
+    from simulacion import BackendSimulado
+
+    cabecera, escaneos = leer_traza(path)
+    app = QApplication.instance() or QApplication([])
+
+    latencias = []
+    ventanas_total = 0
+    cambios_total = 0
+    emparejadas_total = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        backend = BackendSimulado()
+        prototipo.usar_backend(backend)
+        barras = [prototipo.BarraArchivos(b["nombre"], b["archivos"], barra_index=i)
+                  for i, b in enumerate(cabecera["barras"])]
+
+        for escaneo in escaneos:
+            for fila in escaneo.get("+", ()):
+                backend.poner_ventana(prototipo.Ventana(*fila))
+            for hwnd in escaneo.get("-", ()):
+                backend.cerrar_ventana(hwnd)
+            cambios_total += len(escaneo.get("+", ())) + len(escaneo.get("-", ()))
+
+            t0 = time.perf_counter()
+            ventanas = prototipo.enumerar_ventanas()
+            for barra in barras:
+                barra.aplicar_ventanas(ventanas)
+            latencias.append(time.perf_counter() - t0)
+            ventanas_total += len(ventanas)
+            emparejadas_total += sum(len(barra.ventanas_info) for barra in barras)
+            # Los botones sustituidos se borran con deleteLater: sin bucle de eventos
+            # hay que procesar esos borrados a mano
+            QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+        for barra in barras:
+            barra.close()
+            barra.deleteLater()
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    total = time.perf_counter() - inicio
+
+    ordenadas = sorted(latencias)
+    n = len(latencias)
+    return {
+        "traza": path,
+        "anonimizada": cabecera.get("anonimizada", False),
+        "barras": len(cabecera["barras"]),
+        "archivos": sum(len(b["archivos"]) for b in cabecera["barras"]),
+        "escaneos": n,
+        "ventanas_por_escaneo": ventanas_total / n if n else 0.0,
+        "cambios_por_escaneo": cambios_total / n if n else 0.0,
+        "emparejadas_por_escaneo": emparejadas_total / n if n else 0.0,
+        "segundos": total,
+        "escaneos_por_segundo": n / total if total else 0.0,
+        "latencia_ms": {
+            "media": statistics.fmean(latencias) * 1000 if n else 0.0,
+            "p50": percentil(ordenadas, 0.50) * 1000,
+            "p90": percentil(ordenadas, 0.90) * 1000,
+            "p99": percentil(ordenadas, 0.99) * 1000,
+            "max": (ordenadas[-1] if n else 0.0) * 1000,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce una traza de ventanas grabada")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    rep = sub.add_parser("reproducir", help="medir el pipeline con una traza")
+    rep.add_argument("traza")
+    rep.add_argument("--repeticiones", type=int, default=1)
+    rep.add_argument("--json", action="store_true", help="salida en JSON")
+    rep.add_argument("--verbose", action="store_true", help="mostrar los mensajes de Qt")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Avisos de stylesheet y del plugin offscreen que se repiten en cada escaneo
+        from PyQt5.QtCore import qInstallMessageHandler
+        qInstallMessageHandler(lambda tipo, contexto, mensaje: None)
+
+    resultado = reproducir(args.traza, args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return 0
+    latencia = resultado["latencia_ms"]
+    print(f"traza: {resultado['traza']} ({resultado['barras']} barras, {resultado['archivos']} archivos"
+          f"{', anonimizada' if resultado['anonimizada'] else ''})")
+    print(f"escaneos: {resultado['escaneos']}  ventanas/escaneo: {resultado['ventanas_por_escaneo']:.1f}  "
+          f"cambios/escaneo: {resultado['cambios_por_escaneo']:.2f}  "
+          f"emparejadas/escaneo: {resultado['emparejadas_por_escaneo']:.2f}")
+    print(f"rendimiento: {resultado['escaneos_por_segundo']:.0f} escaneos/s ({resultado['segundos']:.2f} s)")
+    print(f"latencia (ms): media {latencia['media']:.3f}  p50 {latencia['p50']:.3f}  "
+          f"p90 {latencia['p90']:.3f}  p99 {latencia['p99']:.3f}  máx {latencia['max']:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())